@@ -20,5 +20,81 @@ class ComponentConfig:
     CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME", "dvrx0az2r")
     CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY", "836786449962117")
     CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET", "a3IHeZDidO4onYDdBdGcYwtcQfo")
+    
+    # AI response cache
+    AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+    AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "512"))
+    AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+    AI_CACHE_MONGO_ENABLED = os.getenv("AI_CACHE_MONGO_ENABLED", "false").lower() == "true"
+    AI_CACHE_MONGO_MAX_ENTRIES = int(os.getenv("AI_CACHE_MONGO_MAX_ENTRIES", "10000"))
+    
+    # AI concurrency / rate limits (0 disables a limit)
+    AI_MAX_CONCURRENT = int(os.getenv("AI_MAX_CONCURRENT", "8"))
+    AI_REQUESTS_PER_MINUTE = int(os.getenv("AI_REQUESTS_PER_MINUTE", "60"))
+    AI_TOKENS_PER_MINUTE = int(os.getenv("AI_TOKENS_PER_MINUTE", "1000000"))
+    
+    # Q&A retrieval (transcripts shorter than MIN_CHARS are sent whole)
+    QA_RETRIEVAL_TOP_K = int(os.getenv("QA_RETRIEVAL_TOP_K", "6"))
+    QA_RETRIEVAL_MIN_CHARS = int(os.getenv("QA_RETRIEVAL_MIN_CHARS", "8000"))
+    
+    # Long-transcript map-reduce (chunk size in characters, concurrent chunk calls per request)
+    TRANSCRIPT_CHUNK_CHARS = int(os.getenv("TRANSCRIPT_CHUNK_CHARS", "12000"))
+    TRANSCRIPT_CHUNK_PARALLELISM = int(os.getenv("TRANSCRIPT_CHUNK_PARALLELISM", "4"))
+    
+    # Live rolling summary during recording
+    ROLLING_SUMMARY_ENABLED = os.getenv("ROLLING_SUMMARY_ENABLED", "true").lower() == "true"
+    ROLLING_SUMMARY_MIN_CHARS = int(os.getenv("ROLLING_SUMMARY_MIN_CHARS", "1500"))
+    ROLLING_SUMMARY_DEBOUNCE_SECONDS = float(os.getenv("ROLLING_SUMMARY_DEBOUNCE_SECONDS", "20"))
+    
+    # Study pack: artifact generators running at once for one request
+    STUDY_PACK_PARALLELISM = int(os.getenv("STUDY_PACK_PARALLELISM", "4"))
+    
+    # Background generation jobs
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_PERSIST = os.getenv("JOB_PERSIST", "true").lower() == "true"
+    JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+    # A persisted job belongs to the worker that claimed it while that worker keeps renewing
+    # the lease; once it lapses (worker died) another worker takes the job over
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+    
+    # Live recording sessions (STT_MAX_WORKERS caps STT calls in flight across all sessions; idle sessions are dropped)
+    STT_MAX_WORKERS = int(os.getenv("STT_MAX_WORKERS", "8"))
+    STT_SESSION_CONCURRENCY = int(os.getenv("STT_SESSION_CONCURRENCY", "3"))  # per session
+    STT_REQUEST_TIMEOUT_SECONDS = float(os.getenv("STT_REQUEST_TIMEOUT_SECONDS", "45"))
+    STT_MAX_RETRIES = int(os.getenv("STT_MAX_RETRIES", "2"))
+    STT_RETRY_BASE_SECONDS = float(os.getenv("STT_RETRY_BASE_SECONDS", "0.5"))  # doubled per attempt, jittered
+    STT_STOP_DRAIN_SECONDS = float(os.getenv("STT_STOP_DRAIN_SECONDS", "30"))  # stop waits this long for queued chunks
+    # Per-session chunk queue; when full: drop_oldest / coalesce / slow_down (see services/chunk_queue.py)
+    STT_QUEUE_MAX = int(os.getenv("STT_QUEUE_MAX", "10"))
+    STT_BACKPRESSURE_POLICY = os.getenv("STT_BACKPRESSURE_POLICY", "coalesce").lower()
+    STT_COALESCE_MAX_SECONDS = float(os.getenv("STT_COALESCE_MAX_SECONDS", "30"))
+    # Near-duplicate transcript segments: compared against the last WINDOW segments by 3-word shingle overlap
+    DEDUPE_WINDOW_SEGMENTS = int(os.getenv("DEDUPE_WINDOW_SEGMENTS", "50"))
+    DEDUPE_SIMILARITY = float(os.getenv("DEDUPE_SIMILARITY", "0.9"))
+    # Transcripts are released in chunk order; a chunk slower than this no longer holds back later ones
+    STT_REORDER_TIMEOUT_SECONDS = float(os.getenv("STT_REORDER_TIMEOUT_SECONDS", "10"))
+    LIVE_SESSION_IDLE_SECONDS = int(os.getenv("LIVE_SESSION_IDLE_SECONDS", "3600"))
+    # Most live sessions one worker holds; idle ones are dropped (oldest first) to make room
+    LIVE_SESSION_MAX = int(os.getenv("LIVE_SESSION_MAX", "100"))
+    
+    # Voice-activity detection: audio is re-cut at pauses; chunks with less speech than SILENCE_RATIO are dropped
+    VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))  # 0 (lenient) .. 3 (strict)
+    VAD_SILENCE_RATIO = float(os.getenv("VAD_SILENCE_RATIO", "0.05"))
+    CHUNK_MIN_SECONDS = float(os.getenv("CHUNK_MIN_SECONDS", "2"))
+    CHUNK_MAX_SECONDS = float(os.getenv("CHUNK_MAX_SECONDS", "12"))
+    CHUNK_PAUSE_MS = int(os.getenv("CHUNK_PAUSE_MS", "300"))
+    CHUNK_OVERLAP_MS = int(os.getenv("CHUNK_OVERLAP_MS", "200"))  # repeated after a cut that had no pause
+
+    # WebSocket fan-out: each client has an outbound queue; a client that falls this far behind is disconnected
+    WS_SEND_QUEUE_MAX = int(os.getenv("WS_SEND_QUEUE_MAX", "100"))
+    WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+    # Cross-worker fan-out of live-session events: memory (one worker) / unix / mongo (see services/backplane.py)
+    BACKPLANE = os.getenv("BACKPLANE", "memory").lower()
+    BACKPLANE_SOCKET = os.getenv("BACKPLANE_SOCKET", "/tmp/student-ai-backplane.sock")
+    # Live transcript segments are also written to MongoDB, so a worker that joins mid-lecture
+    # (or restarts) loads the transcript so far; kept this long after they were spoken
+    LIVE_SEGMENTS_PERSIST = os.getenv("LIVE_SEGMENTS_PERSIST", "true").lower() == "true"
+    LIVE_SEGMENTS_TTL_SECONDS = int(os.getenv("LIVE_SEGMENTS_TTL_SECONDS", "86400"))
 
 settings = ComponentConfig()
@@ -46,6 +46,10 @@ class Database:
             # Sessions
             await cls.db.sessions.create_index("id", unique=True)
             await cls.db.sessions.create_index("timestamp", unique=False)
+            await cls.db.sessions.create_index([("timestamp", -1), ("id", -1)])  # History pagination
+            # Session transcript chunks and chat messages (see services/session_store.py)
+            await cls.db.session_transcripts.create_index([("session_id", 1), ("seq", 1)], unique=True)
+            await cls.db.session_messages.create_index([("session_id", 1), ("seq", 1)], unique=True)
             
             # Quizzes
             await cls.db.quizzes.create_index("quiz_id", unique=True)
@@ -69,5 +73,21 @@ class Database:
             # Translations
             await cls.db.translation_configs.create_index("session_id", unique=True) # One config per session
             await cls.db.translations.create_index("session_id", unique=False)
+            
+            # AI response cache (expired entries removed by MongoDB's TTL monitor)
+            await cls.db.ai_cache.create_index("key", unique=True)
+            await cls.db.ai_cache.create_index("expires_at", expireAfterSeconds=0)
+            await cls.db.ai_cache.create_index("created_at", unique=False)
+            
+            # Background jobs
+            await cls.db.jobs.create_index("job_id", unique=True)
+            await cls.db.jobs.create_index("status", unique=False)
+            await cls.db.jobs.create_index([("status", 1), ("lease_until", 1)])  # lapsed-lease takeover
+
+            # Cross-worker live events (BACKPLANE=mongo); only needed until every change stream has seen them
+            await cls.db.live_events.create_index("created_at", expireAfterSeconds=300)
+            # Live transcript segments, loaded by workers that join a recording late
+            await cls.db.live_segments.create_index([("session_id", 1), ("_id", 1)])
+            await cls.db.live_segments.create_index("created_at", expireAfterSeconds=settings.LIVE_SEGMENTS_TTL_SECONDS)
 
 db = Database()
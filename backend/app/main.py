@@ -1,14 +1,22 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 from app.database import db
-from app.services.audio_transcriber import get_transcriber
+from app.services.session_registry import session_registry, session_topic, SessionLimitError
+from app.services.audio_frames import parse_audio_frame
+from app.services.backplane import backplane
+from app.services.search_index import search_index
+from app.services.stt_backends import close_http_client
 from app.state import manager
+from app.services.ai_cache import ai_cache
+from app.services.ai_service import AIService
+from app.services.job_queue import job_queue
 
 # Import Routers
 # Import Routers
 from app.routers import (
     session, analysis, 
-    quiz, flashcard, one_word, short_answer, summary, translation
+    quiz, flashcard, one_word, short_answer, summary, translation, jobs, search
 )
 
 app = FastAPI(title="AI Student Assistant API")
@@ -31,18 +39,24 @@ app.include_router(one_word.router)
 app.include_router(short_answer.router)
 app.include_router(summary.router)
 app.include_router(translation.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
 
 @app.on_event("startup")
 async def startup_db_client():
     await db.connect_db()
+    await backplane.start()
+    await job_queue.start()
+    # Build the search index in the background so the first search doesn't pay for it
+    asyncio.create_task(search_index.ensure_loaded())
     
-    # Initialize transcriber (Lazy load to prevent startup hang)
-    # transcriber = get_transcriber()
-    # if transcriber.available:
-    #     print("✅ OnDemand transcription ready")
+    # Transcribers are created per live session on first use (lazy, to prevent startup hang)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await job_queue.stop()
+    await backplane.stop()
+    await close_http_client()
     await db.close_db()
 
 @app.get("/")
@@ -54,7 +68,15 @@ async def health_check():
     # Basic health check
     return {
         "status": "healthy", 
-        "database": "connected" if db.client else "disconnected"
+        "database": "connected" if db.client else "disconnected",
+        "ai_cache": ai_cache.stats(),
+        "ai_coalescing": AIService.coalescing_stats(),
+        "ai_governor": AIService.governor_stats(),
+        "jobs": job_queue.stats(),
+        "live_sessions": session_registry.stats(),
+        "websockets": manager.stats(),
+        "backplane": backplane.stats(),
+        "search": search_index.stats()
     }
 
 import json
@@ -63,19 +85,66 @@ import json
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
-    transcriber = get_transcriber()
+    # ?session_id=... picks the live session; clients that don't send one share the default
+    try:
+        live = session_registry.attach(websocket, websocket.query_params.get("session_id"))
+    except SessionLimitError as e:
+        print(f"⚠️ WebSocket refused: {e}")
+        manager.disconnect(websocket)
+        await websocket.close(code=1013)
+        return
+    last_seq = None
     try:
         while True:
-            data = await websocket.receive_text()
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", 1000))
+            
+            if received.get("bytes") is not None:
+                # Binary audio frame: header + raw audio, no base64/JSON
+                try:
+                    frame = parse_audio_frame(received["bytes"])
+                except ValueError as e:
+                    print(f"⚠️ Bad audio frame: {e}")
+                    continue
+                if last_seq is not None and frame.seq != last_seq + 1:
+                    print(f"⚠️ Audio frames out of sequence ({last_seq} -> {frame.seq})")
+                last_seq = frame.seq
+                target = live
+                if frame.session_id and frame.session_id != live.session_id:
+                    # Only into a session that is already recording; never create one from a frame
+                    target = session_registry.sessions.get(frame.session_id)
+                    if target is None or not target.is_recording:
+                        print(f"⚠️ Audio frame for unknown or idle session '{frame.session_id}' dropped")
+                        continue
+                target.add_producer(websocket)
+                await target.transcriber.process_audio_bytes(frame.payload, frame.codec)
+                continue
+            
+            data = received.get("text")
+            if data is None:
+                continue
             try:
                 message = json.loads(data)
                 if message.get("type") == "audio" and message.get("data"):
-                    # Pass audio data to transcriber
-                    transcriber.process_external_audio(message["data"])
+                    # Pass audio data to this session's transcriber
+                    live.add_producer(websocket)
+                    await live.transcriber.process_external_audio(message["data"])
+                elif message.get("type") == "subscribe" and message.get("session_id"):
+                    # Also follow another live session's messages (e.g. a dashboard watching several rooms)
+                    manager.subscribe(websocket, session_topic(message["session_id"]))
+                elif message.get("type") == "unsubscribe" and message.get("session_id"):
+                    manager.unsubscribe(websocket, session_topic(message["session_id"]))
             except json.JSONDecodeError:
                 pass
             except Exception as e:
                 print(f"Error processing message: {e}")
                 
     except WebSocketDisconnect:
+        pass
+    except RuntimeError:
+        # Socket already closed by the server (e.g. evicted as a slow consumer)
+        pass
+    finally:
         manager.disconnect(websocket)
+        session_registry.detach(websocket)
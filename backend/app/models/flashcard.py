@@ -22,3 +22,4 @@ class GenerateFlashcardsRequest(BaseModel):
     transcript_text: Optional[str] = None
     num_cards: int = 15
     card_types: Optional[List[str]] = None  # e.g. ["definition", "formula"]
+    background: bool = False  # Return a job id immediately instead of waiting
@@ -21,6 +21,7 @@ class GenerateOneWordRequest(BaseModel):
     session_id: Optional[str] = None
     transcript_text: Optional[str] = None
     num_questions: int = 20
+    background: bool = False  # Return a job id immediately instead of waiting
 
 class CheckOneWordAnswerRequest(BaseModel):
     question_id: str
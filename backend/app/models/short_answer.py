@@ -21,6 +21,7 @@ class GenerateShortAnswerRequest(BaseModel):
     session_id: Optional[str] = None
     transcript_text: Optional[str] = None
     num_questions: int = 10
+    background: bool = False  # Return a job id immediately instead of waiting
 
 class EvaluateAnswerRequest(BaseModel):
     question_id: str
@@ -1,32 +1,78 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.services.qa_chatbot import get_chatbot, is_ollama_available
 from app.services.ai_service import AIService
+from app.services.quiz_service import QuizService
+from app.services.flashcard_service import FlashcardService
+from app.services.one_word_service import OneWordService
+from app.services.short_answer_service import ShortAnswerService
+from app.services.job_queue import job_queue, job_response
 from app.database import db
-from app.state import current_session
+from app.services.session_registry import session_registry
+from app.services.search_index import search_index
+from app.services import session_store
+from app.utils.chunking import split_transcript, allocate_counts, map_chunks, dedupe_by, normalize_text_key
+from app.config import settings
 from pydantic import BaseModel
+from typing import List, Optional
+import asyncio
+import json
 
 router = APIRouter()
 
 class QuestionRequest(BaseModel):
     question: str
     think_mode: bool = False
+    session_id: Optional[str] = None  # Live recording session; defaults to the shared one
+    last_minutes: Optional[float] = None  # Only ask about what was said in the last N minutes
 
 class AnalyzeRequest(BaseModel):
     sessionId: str
 
+STUDY_PACK_ARTIFACTS = ["summary", "terminologies", "qa", "quiz", "flashcards", "one_word", "short_answer"]
+
+class StudyPackRequest(BaseModel):
+    sessionId: str
+    include: Optional[List[str]] = None  # Subset of STUDY_PACK_ARTIFACTS; default is all
+    background: bool = False  # Return a job id immediately instead of waiting
+
+def _sse(event: dict) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"data: {json.dumps(event)}\n\n"
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Stop reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _live_context(request: QuestionRequest):
+    """(transcript, index) to answer from: the whole live transcript, or just its recent segments"""
+    live = session_registry.find(request.session_id)
+    if live is None:
+        raise HTTPException(status_code=404, detail="Live session not found")
+    await live.load_transcript()
+    if request.last_minutes:
+        # A recent window is short enough to pass whole; the index covers the full transcript
+        return live.transcript.text_since(request.last_minutes * 60), None
+    return live.transcript.text, live.transcript_index
+
 @router.post("/api/qa/ask")
 async def ask_question(request: QuestionRequest):
     """Ask a question based on current session transcript"""
     if not is_ollama_available():
         return {"success": False, "answer": "AI Service not available."}
     
-    transcript = current_session.get("transcript", "")
+    transcript, index = await _live_context(request)
     if len(transcript.strip()) < 10:
         return {"success": False, "answer": "Not enough transcript yet."}
     
     chatbot = get_chatbot()
     # Call async ask method
-    result = await chatbot.ask(request.question, transcript, request.think_mode)
+    result = await chatbot.ask(request.question, transcript, request.think_mode, index=index)
     
     return {
         "success": True,
@@ -36,15 +82,28 @@ async def ask_question(request: QuestionRequest):
         "think_mode": request.think_mode
     }
 
-@router.post("/api/analyze/terminologies")
-async def extract_terminologies(request: AnalyzeRequest):
-    if db.db is None: raise HTTPException(status_code=503)
-    session = await db.db.sessions.find_one({"id": request.sessionId})
-    if not session: raise HTTPException(status_code=404)
+@router.post("/api/qa/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """Streaming variant of /api/qa/ask — tokens are sent as Server-Sent Events"""
+    if not is_ollama_available():
+        return {"success": False, "answer": "AI Service not available."}
+    
+    transcript, index = await _live_context(request)
+    if len(transcript.strip()) < 10:
+        return {"success": False, "answer": "Not enough transcript yet."}
+    
+    chatbot = get_chatbot()
     
-    transcript = session.get("transcript", "")
+    async def events():
+        async for event in chatbot.ask_stream(request.question, transcript, request.think_mode, index=index):
+            yield _sse(event)
     
-    prompt = f"""You are an expert academic analyzer. Extract ALL key technical terms, 
+    return _sse_response(events())
+
+async def _extract_terminologies(transcript: str) -> dict:
+    """Extract key terms chunk by chunk; the first (earliest) mention of a term wins"""
+    def build_prompt(chunk: str) -> str:
+        return f"""You are an expert academic analyzer. Extract ALL key technical terms, 
     concepts, and important vocabulary from this lecture transcript.
     
     For EACH term, provide a comprehensive analysis:
@@ -64,53 +123,61 @@ async def extract_terminologies(request: AnalyzeRequest):
     5. Any formulas, laws, or principles referenced
     
     TRANSCRIPT:
-    {transcript[:15000]}
+    {chunk}
     
     Return ONLY the JSON array, no other text."""
     
+    async def extract_part(chunk: str, idx: int) -> list:
+        data = await AIService.generate_json(build_prompt(chunk))
+        return data if isinstance(data, list) else data.get("terms", data.get("terminologies", []))
+    
+    parts = await map_chunks(split_transcript(transcript), extract_part)
+    
+    terminologies = {}
+    for item in (item for part in parts for item in part):
+        term = item.get("term", "Unknown")
+        key = term.lower().replace(" ", "_")
+        if key in terminologies:
+            continue
+        terminologies[key] = {
+            "original_term": term, 
+            "definition": item.get("definition", ""),
+            "subject_area": item.get("subject_area", "General"),
+            "category": item.get("category", "concept"),
+            "source": item.get("source", "Mentioned in transcript")
+        }
+    return terminologies
+
+@router.post("/api/analyze/terminologies")
+async def extract_terminologies(request: AnalyzeRequest):
+    if db.db is None: raise HTTPException(status_code=503)
+    transcript = await session_store.get_transcript(request.sessionId)
+    if transcript is None: raise HTTPException(status_code=404)
+    
     try:
-        data = await AIService.generate_json(prompt)
-        terms_list = data if isinstance(data, list) else data.get("terms", data.get("terminologies", []))
-        
-        terminologies = {}
-        for item in terms_list:
-            term = item.get("term", "Unknown")
-            key = term.lower().replace(" ", "_")
-            terminologies[key] = {
-                "original_term": term, 
-                "definition": item.get("definition", ""),
-                "subject_area": item.get("subject_area", "General"),
-                "category": item.get("category", "concept"),
-                "source": item.get("source", "Mentioned in transcript")
-            }
+        terminologies = await _extract_terminologies(transcript)
             
         # Update DB
         await db.db.sessions.update_one(
             {"id": request.sessionId},
             {"$set": {"terminologies": terminologies}}
         )
+        await search_index.index_session({"id": request.sessionId, "terminologies": terminologies})
         
         return {"success": True, "terminologies": terminologies}
     except Exception as e:
         print(f"❌ Terminologies extraction failed: {e}")
         return {"success": False, "message": str(e)}
 
-@router.post("/api/analyze/qa")
-async def generate_qa(request: AnalyzeRequest):
-    """Generate Q&A pairs from transcript"""
-    if db.db is None: raise HTTPException(status_code=503)
-    session = await db.db.sessions.find_one({"id": request.sessionId})
-    transcript = session.get("transcript", "") if session else ""
-    
-    if not transcript or len(transcript.strip()) < 10:
-        return {"success": False, "message": "Not enough transcript content"}
-    
-    prompt = f"""You are an expert educator. Generate 10 high-quality Q&A pairs from this lecture transcript.
+async def _generate_qa_pairs(transcript: str, num_pairs: int = 10) -> list:
+    """Generate Q&A pairs, shared across chunks so every part of a long lecture is covered"""
+    def build_prompt(chunk: str, count: int) -> str:
+        return f"""You are an expert educator. Generate {count} high-quality Q&A pairs from this lecture transcript.
     
-    Create a MIX of question types:
-    - 3-4 FACTUAL questions (test recall of specific facts/definitions from the lecture)
-    - 3-4 CONCEPTUAL questions (test understanding of ideas and relationships)
-    - 2-3 ANALYTICAL questions (require combining multiple concepts or applying knowledge)
+    Create a MIX of question types (roughly 40% / 40% / 20%):
+    - FACTUAL questions (test recall of specific facts/definitions from the lecture)
+    - CONCEPTUAL questions (test understanding of ideas and relationships)
+    - ANALYTICAL questions (require combining multiple concepts or applying knowledge)
     
     Each question should:
     - Be clear and specific
@@ -123,15 +190,37 @@ async def generate_qa(request: AnalyzeRequest):
     - "answer": The detailed answer
     
     TRANSCRIPT:
-    {transcript[:15000]}
+    {chunk}
     
     Return ONLY the JSON array."""
     
-    try:
-        qa_list = await AIService.generate_json(prompt)
+    chunks = split_transcript(transcript)
+    work = [(c, n) for c, n in zip(chunks, allocate_counts(num_pairs, chunks)) if n > 0]
+    
+    async def generate_part(chunk: str, idx: int) -> list:
+        qa_part = await AIService.generate_json(build_prompt(chunk, work[idx][1]))
         # Handle if AI returns {questions: [...]} instead of [...]
-        if isinstance(qa_list, dict):
-            qa_list = qa_list.get("questions", qa_list.get("qa", []))
+        if isinstance(qa_part, dict):
+            qa_part = qa_part.get("questions", qa_part.get("qa", []))
+        return qa_part
+    
+    parts = await map_chunks([c for c, _ in work], generate_part)
+    return dedupe_by(
+        (qa for part in parts for qa in part),
+        key=lambda qa: normalize_text_key(qa.get("question", ""))
+    )
+
+@router.post("/api/analyze/qa")
+async def generate_qa(request: AnalyzeRequest):
+    """Generate Q&A pairs from transcript"""
+    if db.db is None: raise HTTPException(status_code=503)
+    transcript = await session_store.get_transcript(request.sessionId)
+    
+    if not transcript or len(transcript.strip()) < 10:
+        return {"success": False, "message": "Not enough transcript content"}
+    
+    try:
+        qa_list = await _generate_qa_pairs(transcript)
         
         await db.db.sessions.update_one(
             {"id": request.sessionId},
@@ -142,19 +231,9 @@ async def generate_qa(request: AnalyzeRequest):
         print(f"❌ Q&A generation failed: {e}")
         return {"success": False, "message": str(e)}
 
-@router.post("/api/analyze/summarize")
-async def summarize_transcript(request: AnalyzeRequest):
-    """Generate a detailed summary from transcript — returns plain string for frontend"""
-    if db.db is None: raise HTTPException(status_code=503)
-    session = await db.db.sessions.find_one({"id": request.sessionId})
-    if not session: raise HTTPException(status_code=404, detail="Session not found")
-    
-    transcript = session.get("transcript", "")
-    if not transcript or len(transcript.strip()) < 10:
-        return {"success": False, "message": "Not enough transcript content"}
-    
-    prompt = f"""You are an expert academic summarizer. Create a comprehensive, structured summary 
-    of this lecture transcript.
+def _summary_prompt(material: str, label: str = "TRANSCRIPT") -> str:
+    return f"""You are an expert academic summarizer. Create a comprehensive, structured summary 
+    of this lecture {"transcript" if label == "TRANSCRIPT" else "from the notes below"}.
     
     Format your summary as follows:
     1. Start with a brief overview paragraph (2-3 sentences)
@@ -165,21 +244,171 @@ async def summarize_transcript(request: AnalyzeRequest):
     Be thorough and detailed — this summary should help a student who missed the lecture 
     understand ALL the key content that was covered.
     
-    TRANSCRIPT:
-    {transcript[:20000]}
+    {label}:
+    {material}
     
     Provide the summary as plain text (not JSON). Use numbers and letters for structure."""
+
+async def _build_summary_prompt(transcript: str) -> str:
+    """
+    Short transcripts are summarized directly. Long ones are first condensed
+    part-by-part (concurrently) into detailed notes, which feed the final summary.
+    """
+    chunks = split_transcript(transcript)
+    if len(chunks) <= 1:
+        return _summary_prompt(transcript)
+    
+    async def notes_for(chunk: str, idx: int) -> str:
+        return await AIService.generate_content(f"""You are taking detailed study notes on part {idx + 1} of {len(chunks)} of a lecture.
+    List every topic, definition, example and conclusion in this part as concise bullet points.
+    Do not add anything that is not in the transcript.
+    
+    TRANSCRIPT PART:
+    {chunk}""")
+    
+    notes = await map_chunks(chunks, notes_for)
+    material = "\n\n".join(f"PART {i + 1}:\n{n.strip()}" for i, n in enumerate(notes))
+    return _summary_prompt(material, label="LECTURE NOTES (consecutive parts)")
+
+async def _generate_summary_text(transcript: str) -> str:
+    prompt = await _build_summary_prompt(transcript)
+    return await AIService.generate_content(prompt)
+
+@router.post("/api/analyze/summarize")
+async def summarize_transcript(request: AnalyzeRequest):
+    """Generate a detailed summary from transcript — returns plain string for frontend"""
+    if db.db is None: raise HTTPException(status_code=503)
+    transcript = await session_store.get_transcript(request.sessionId)
+    if transcript is None: raise HTTPException(status_code=404, detail="Session not found")
+    
+    if not transcript or len(transcript.strip()) < 10:
+        return {"success": False, "message": "Not enough transcript content"}
     
     try:
-        summary_text = await AIService.generate_content(prompt)
+        summary_text = await _generate_summary_text(transcript)
         
         # Save to session
         await db.db.sessions.update_one(
             {"id": request.sessionId},
             {"$set": {"summary": summary_text}}
         )
+        await search_index.index_session({"id": request.sessionId, "summary": summary_text})
         
         return {"success": True, "summary": summary_text}
     except Exception as e:
         print(f"❌ Summary generation failed: {e}")
         return {"success": False, "message": str(e)}
+
+@router.post("/api/analyze/summarize/stream")
+async def summarize_transcript_stream(request: AnalyzeRequest):
+    """Streaming variant of /api/analyze/summarize — tokens as Server-Sent Events, final text saved to the session"""
+    if db.db is None: raise HTTPException(status_code=503)
+    transcript = await session_store.get_transcript(request.sessionId)
+    if transcript is None: raise HTTPException(status_code=404, detail="Session not found")
+    
+    if not transcript or len(transcript.strip()) < 10:
+        return {"success": False, "message": "Not enough transcript content"}
+    
+    async def events():
+        parts = []
+        try:
+            prompt = await _build_summary_prompt(transcript)
+            async for text in AIService.stream_content(prompt):
+                parts.append(text)
+                yield _sse({"type": "token", "text": text})
+            
+            summary_text = "".join(parts)
+            await db.db.sessions.update_one(
+                {"id": request.sessionId},
+                {"$set": {"summary": summary_text}}
+            )
+            await search_index.index_session({"id": request.sessionId, "summary": summary_text})
+            yield _sse({"type": "done", "summary": summary_text})
+        except Exception as e:
+            print(f"❌ Summary stream failed: {e}")
+            yield _sse({"type": "error", "message": str(e)})
+    
+    return _sse_response(events())
+
+@router.post("/api/analyze/study-pack")
+async def generate_study_pack(request: StudyPackRequest):
+    """
+    Generate every study artifact for a session in one pass.
+    The transcript is loaded once, generators run concurrently under a shared limit,
+    and results are written with one update to the session plus one insert per artifact collection.
+    """
+    if request.background:
+        job = await job_queue.submit("study_pack", request.dict(), session_id=request.sessionId)
+        return JSONResponse(status_code=202, content=job_response(job))
+    return await _generate_study_pack(request)
+
+async def _generate_study_pack(request: StudyPackRequest) -> dict:
+    if db.db is None: raise HTTPException(status_code=503)
+    transcript = await session_store.get_transcript(request.sessionId)
+    if transcript is None: raise HTTPException(status_code=404, detail="Session not found")
+    
+    if not transcript or len(transcript.strip()) < 10:
+        return {"success": False, "message": "Not enough transcript content"}
+    
+    include = [a for a in (request.include or STUDY_PACK_ARTIFACTS) if a in STUDY_PACK_ARTIFACTS]
+    session_id = request.sessionId
+    generators = {
+        "summary": lambda: _generate_summary_text(transcript),
+        "terminologies": lambda: _extract_terminologies(transcript),
+        "qa": lambda: _generate_qa_pairs(transcript),
+        "quiz": lambda: QuizService.generate_quiz(session_id, transcript, save=False),
+        "flashcards": lambda: FlashcardService.generate_flashcards(session_id, transcript, save=False),
+        "one_word": lambda: OneWordService.generate_questions(session_id, transcript, save=False),
+        "short_answer": lambda: ShortAnswerService.generate_questions(session_id, transcript, save=False)
+    }
+    
+    semaphore = asyncio.Semaphore(settings.STUDY_PACK_PARALLELISM)
+    
+    async def run(name: str):
+        async with semaphore:
+            return await generators[name]()
+    
+    outcomes = await asyncio.gather(*(run(name) for name in include), return_exceptions=True)
+    results = {}
+    errors = {}
+    for name, outcome in zip(include, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"❌ Study pack: {name} failed: {outcome}")
+            errors[name] = str(outcome)
+        else:
+            results[name] = outcome
+    
+    # Batched persistence
+    session_fields = {}
+    if "summary" in results: session_fields["summary"] = results["summary"]
+    if "terminologies" in results: session_fields["terminologies"] = results["terminologies"]
+    if "qa" in results: session_fields["qa_pairs"] = results["qa"]
+    
+    writes = []
+    if session_fields:
+        writes.append(db.db.sessions.update_one({"id": session_id}, {"$set": session_fields}))
+    collections = {
+        "quiz": db.db.quizzes,
+        "flashcards": db.db.flashcard_sets,
+        "one_word": db.db.one_word_question_sets,
+        "short_answer": db.db.short_answer_question_sets
+    }
+    for name, collection in collections.items():
+        if name in results:
+            writes.append(collection.insert_one(results[name].dict()))
+    await asyncio.gather(*writes)
+    
+    if session_fields:
+        await search_index.index_session({"id": session_id, **session_fields})
+    for name in collections:
+        if name in results:
+            await search_index.index_artifact(name, results[name].dict())
+    
+    return {
+        "success": bool(results),
+        "sessionId": session_id,
+        **jsonable_encoder(results),
+        "errors": errors
+    }
+
+job_queue.register("study_pack", lambda params: _generate_study_pack(StudyPackRequest(**params)))
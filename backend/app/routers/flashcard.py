@@ -1,19 +1,26 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from app.services.flashcard_service import FlashcardService
 from app.models.flashcard import FlashcardSet, GenerateFlashcardsRequest
+from app.services.job_queue import job_queue, job_response
 from app.database import db
+from app.services import session_store
 
 router = APIRouter()
 
 @router.post("/api/analyze/generate-flashcards", response_model=FlashcardSet)
 async def generate_flashcards(request: GenerateFlashcardsRequest):
+    if request.background:
+        job = await job_queue.submit("flashcards", request.dict(), session_id=request.session_id)
+        return JSONResponse(status_code=202, content=job_response(job))
+    return await _generate_flashcards(request)
+
+async def _generate_flashcards(request: GenerateFlashcardsRequest):
     transcript = request.transcript_text
     
     if request.session_id and not transcript:
         if db.db is not None:
-            session = await db.db.sessions.find_one({"id": request.session_id})
-            if session:
-                transcript = session.get("transcript", "")
+            transcript = await session_store.get_transcript(request.session_id)
     
     if not transcript:
         raise HTTPException(status_code=400, detail="Transcript required")
@@ -30,6 +37,8 @@ async def generate_flashcards(request: GenerateFlashcardsRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+job_queue.register("flashcards", lambda params: _generate_flashcards(GenerateFlashcardsRequest(**params)))
+
 @router.get("/api/flashcards/{flashcard_set_id}", response_model=FlashcardSet)
 async def get_flashcard_set(flashcard_set_id: str):
     fs = await FlashcardService.get_flashcard_set(flashcard_set_id)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, HTTPException
+from app.services.job_queue import job_queue, job_response
+
+router = APIRouter()
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a background generation job. Completion is also pushed over /ws as a "job" message."""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
@@ -1,19 +1,26 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from app.services.one_word_service import OneWordService
 from app.models.one_word import OneWordQuestionSet, GenerateOneWordRequest, CheckOneWordAnswerRequest, CheckOneWordActionResult
+from app.services.job_queue import job_queue, job_response
 from app.database import db
+from app.services import session_store
 
 router = APIRouter()
 
 @router.post("/api/analyze/generate-one-word-questions", response_model=OneWordQuestionSet)
 async def generate_one_word_questions(request: GenerateOneWordRequest):
+    if request.background:
+        job = await job_queue.submit("one_word", request.dict(), session_id=request.session_id)
+        return JSONResponse(status_code=202, content=job_response(job))
+    return await _generate_one_word_questions(request)
+
+async def _generate_one_word_questions(request: GenerateOneWordRequest):
     transcript = request.transcript_text
     
     if request.session_id and not transcript:
         if db.db is not None:
-            session = await db.db.sessions.find_one({"id": request.session_id})
-            if session:
-                transcript = session.get("transcript", "")
+            transcript = await session_store.get_transcript(request.session_id)
     
     if not transcript:
         raise HTTPException(status_code=400, detail="Transcript required")
@@ -27,6 +34,8 @@ async def generate_one_word_questions(request: GenerateOneWordRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+job_queue.register("one_word", lambda params: _generate_one_word_questions(GenerateOneWordRequest(**params)))
+
 @router.post("/api/one-word-questions/{question_set_id}/check-answer", response_model=CheckOneWordActionResult)
 async def check_one_word_answer(question_set_id: str, request: CheckOneWordAnswerRequest):
     try:
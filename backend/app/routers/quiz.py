@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from app.services.quiz_service import QuizService
 from app.models.quiz import Quiz, QuizSubmissionRequest, QuizSubmissionResult
+from app.services.job_queue import job_queue, job_response
 from app.database import db
+from app.services import session_store
 
 router = APIRouter()
 
@@ -13,20 +16,26 @@ class GenerateQuizRequest(BaseModel):
     num_questions: int = 10
     difficulty: str = "medium"
     topic: Optional[str] = None
+    background: bool = False  # Return a job id immediately instead of waiting
 
 @router.post("/api/analyze/generate-quiz", response_model=Quiz)
 async def generate_quiz(request: GenerateQuizRequest):
     """
     Generate a quiz from a session ID or direct transcript text.
+    With background=true, returns 202 and a job id to poll at /api/jobs/{job_id}.
     """
+    if request.background:
+        job = await job_queue.submit("quiz", request.dict(), session_id=request.session_id)
+        return JSONResponse(status_code=202, content=job_response(job))
+    return await _generate_quiz(request)
+
+async def _generate_quiz(request: GenerateQuizRequest) -> Quiz:
     transcript = request.transcript_text
     
     # If session_id provided, fetch transcript from DB
     if request.session_id and not transcript:
         if db.db is not None:
-            session = await db.db.sessions.find_one({"id": request.session_id})
-            if session:
-                transcript = session.get("transcript", "")
+            transcript = await session_store.get_transcript(request.session_id)
     
     if not transcript:
         raise HTTPException(status_code=400, detail="Transcript text or valid Session ID required")
@@ -43,6 +52,8 @@ async def generate_quiz(request: GenerateQuizRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+job_queue.register("quiz", lambda params: _generate_quiz(GenerateQuizRequest(**params)))
+
 @router.post("/api/quiz/{quiz_id}/submit", response_model=QuizSubmissionResult)
 async def submit_quiz(quiz_id: str, request: QuizSubmissionRequest):
     """
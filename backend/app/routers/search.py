@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from app.services.search_index import search_index, SESSION_FIELDS, ARTIFACT_SOURCES
+from app.database import db
+from typing import Optional
+import time
+
+router = APIRouter()
+
+SEARCH_KINDS = set(SESSION_FIELDS) | set(ARTIFACT_SOURCES)
+
+@router.get("/api/search")
+async def search(q: str, limit: int = 10, kind: Optional[str] = None, session_id: Optional[str] = None):
+    """
+    Ranked full-text search over saved transcripts, summaries, terminologies and generated study material.
+    `kind` is a comma-separated filter (e.g. "transcript,flashcards"). Each result carries a snippet and
+    [start, end) highlight offsets into it.
+    """
+    if db.db is None: raise HTTPException(status_code=503, detail="Database not connected")
+    kinds = {k.strip() for k in kind.split(",") if k.strip()} if kind else None
+    if kinds and not kinds <= SEARCH_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown kind; expected any of {sorted(SEARCH_KINDS)}")
+    
+    await search_index.ensure_loaded()
+    started = time.perf_counter()
+    results = search_index.search(q, limit=max(1, min(limit, 50)), kinds=kinds, session_id=session_id)
+    return {
+        "query": q,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
@@ -1,13 +1,19 @@
 from fastapi import APIRouter, HTTPException
-from app.state import current_session, transcription_queue, manager
-from app.services.audio_transcriber import get_transcriber, is_ondemand_available
+from app.services.audio_transcriber import is_ondemand_available
 from app.services.qa_chatbot import get_chatbot, is_ollama_available
+from app.services.session_registry import session_registry, DEFAULT_SESSION_ID, SessionLimitError, LiveSession
+from app.services.search_index import search_index
+from app.services import session_store
 from app.database import db
 from app.services.ai_service import AIService
+from app.config import settings
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import asyncio
+import base64
+import time
+import uuid
 
 router = APIRouter()
 
@@ -15,57 +21,61 @@ class SaveSessionRequest(BaseModel):
     transcript: str
     chat: List[Dict[str, Any]]
     name: Optional[str] = None
+    liveSessionId: Optional[str] = None  # Live recording session to take the rolling summary from
+
+def _find_live(session_id: Optional[str]) -> LiveSession:
+    """An existing live session (only /api/session/start and /ws create them)"""
+    live = session_registry.find(session_id)
+    if live is None:
+        raise HTTPException(status_code=404, detail="Live session not found")
+    return live
 
 @router.post("/api/session/start")
-async def start_session():
+async def start_session(session_id: Optional[str] = None):
     """Start a new recording session with OnDemand transcription"""
-    # Set recording state but DON'T clear transcript/messages
-    current_session["is_recording"] = True
-    transcription_queue.clear()
+    try:
+        live = session_registry.get(session_id)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     
     # Check if OnDemand transcription is available
     if not is_ondemand_available():
-        await manager.broadcast({"type": "status", "status": "idle"})
+        await live.broadcast({"type": "status", "status": "idle"})
         return {"success": False, "message": "OnDemand transcription not configured."}
     
-    transcriber = get_transcriber()
-    sent_texts = set()
-    
-    def sync_callback(text: str):
-        text_lower = text.lower().strip()
-        if text_lower not in sent_texts and text not in transcription_queue:
-            sent_texts.add(text_lower)
-            current_session["transcript"] += text + " "
-            transcription_queue.append(text)
-            print(f"✅ NEW transcription queued: {text}")
-    
-    success = transcriber.start_recording(sync_callback)
+    # Set recording state but DON'T clear transcript/messages
+    success = await live.start()
     
     if success:
-        await manager.broadcast({"type": "status", "status": "recording"})
-        return {"success": True, "message": "Recording started"}
+        await live.broadcast({"type": "status", "status": "recording"})
+        return {"success": True, "message": "Recording started", "sessionId": live.session_id}
     else:
+        live.is_recording = False
         return {"success": False, "message": "Failed to start recording"}
 
 @router.post("/api/session/stop")
-async def stop_session():
+async def stop_session(session_id: Optional[str] = None):
     """Stop the current recording session"""
-    current_session["is_recording"] = False
+    live = _find_live(session_id)
+    # Returns once queued chunks are transcribed (or STT_STOP_DRAIN_SECONDS pass)
+    await live.stop()
     
-    if is_ondemand_available():
-        transcriber = get_transcriber()
-        transcriber.stop_recording()
+    if settings.ROLLING_SUMMARY_ENABLED:
+        # Fold in the tail now so the summary is ready by the time the user saves
+        asyncio.create_task(live.rolling_summarizer.flush())
     
-    await manager.broadcast({"type": "status", "status": "idle"})
+    await live.broadcast({"type": "status", "status": "idle"})
     return {"success": True, "message": "Session stopped"}
 
 @router.post("/api/session/clear")
-async def clear_session():
+async def clear_session(session_id: Optional[str] = None):
     """Clear the current session data"""
-    current_session["transcript"] = ""
-    current_session["messages"] = []
-    current_session["is_recording"] = False
-    transcription_queue.clear()
+    live = _find_live(session_id)
+    await live.stop()
+    live.clear()
+    await live.forget_transcript()
+    # Other workers drop their copy too
+    await live.broadcast({"type": "cleared"})
     
     if is_ollama_available():
         chatbot = get_chatbot()
@@ -73,24 +83,43 @@ async def clear_session():
     
     return {"success": True, "message": "Session cleared"}
 
+@router.get("/api/session/status")
+async def session_status(session_id: Optional[str] = None):
+    """Live session counters, including how much incoming audio the VAD gate judged to be speech"""
+    return {"success": True, **_find_live(session_id).stats()}
+
+@router.get("/api/session/transcript")
+async def session_transcript(
+    session_id: Optional[str] = None,
+    since_seconds: Optional[float] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None
+):
+    """Live transcript segments, optionally limited to the last N seconds or an epoch-seconds range"""
+    live = _find_live(session_id)
+    await live.load_transcript()
+    buffer = live.transcript
+    if since_seconds is not None:
+        start = time.time() - since_seconds
+    segments = buffer.between(start, end)
+    return {
+        "success": True,
+        "segments": segments,
+        "text": " ".join(s["text"] for s in segments)
+    }
+
 @router.get("/api/transcription/poll")
-async def poll_transcription():
-    """Poll for new transcription text"""
-    if transcription_queue:
-        texts = list(set(transcription_queue))
-        transcription_queue.clear()
-        
-        for text in texts:
-            await manager.broadcast({"type": "transcript", "text": text})
-            
-        return {"success": True, "texts": texts}
-    return {"success": True, "texts": []}
+async def poll_transcription(session_id: Optional[str] = None):
+    """Poll for new transcription text (fallback for clients without a live WebSocket)"""
+    # Texts were already pushed over /ws when produced; just drain in arrival order
+    return {"success": True, "texts": _find_live(session_id).drain()}
 
 @router.post("/api/session/save")
 async def save_session(request: SaveSessionRequest):
     """Save the current session with refined transcript"""
     try:
-        session_id = f"session_{int(datetime.now().timestamp())}"
+        # Random suffix: two saves in the same second must not share an id
+        session_id = f"session_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}"
         
         if request.name and request.name.strip():
             session_name = request.name.strip()
@@ -119,20 +148,27 @@ async def save_session(request: SaveSessionRequest):
     
         if db.db is None:
              raise HTTPException(status_code=503, detail="Database not connected")
+        
+        # Live summary built during recording, only if the caller says which live session
+        # the transcript came from; taking it starts that session's summary over
+        summary = ""
+        live = session_registry.sessions.get(request.liveSessionId or DEFAULT_SESSION_ID)
+        if live is not None:
+            if request.liveSessionId and settings.ROLLING_SUMMARY_ENABLED:
+                summary = await live.rolling_summarizer.take()
+            live.saved = True
     
-        # Manual insert to match old structure (or use create_session if I migrate it)
-        # The old `create_session` in `database.py` did insert_one.
-        session_doc = {
+        # Header only; transcript chunks and chat messages go to their own collections
+        header = {
             "id": session_id,
             "name": session_name,
             "timestamp": datetime.now(),
-            "transcript": refined_transcript,
-            "chat_messages": request.chat,
             "terminologies": {}, # Default empty
-            "summary": ""
+            "summary": summary
         }
         
-        await db.db.sessions.insert_one(session_doc)
+        header = await session_store.create_session(header, refined_transcript, request.chat)
+        await search_index.index_session({**header, "transcript": refined_transcript})
         
         return {
             "success": True, 
@@ -146,51 +182,95 @@ async def save_session(request: SaveSessionRequest):
         print(f"❌ Save Session Error: {e}")
         return {"success": False, "message": f"Failed to save: {str(e)}"}
 
+SESSION_PAGE_MAX = 100
+SESSION_PREVIEW_CHARS = session_store.PREVIEW_CHARS
+
+def _not_empty(field: str) -> dict:
+    """Aggregation expression: field is present and not "", {} or []"""
+    value = {"$ifNull": [f"${field}", None]}
+    return {"$not": [{"$in": [value, {"$literal": [None, "", {}, []]}]}]}
+
+# History list card: stored on the header at save time; computed in MongoDB for
+# sessions saved with the transcript and chat inline, so those never leave the database
+SESSION_LIST_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "name": {"$ifNull": ["$name", "Untitled Session"]},
+    "timestamp": 1,
+    "transcript_chars": {"$ifNull": ["$transcript_chars", {"$strLenCP": {"$ifNull": ["$transcript", ""]}}]},
+    "preview": {"$ifNull": ["$preview", {"$substrCP": [{"$ifNull": ["$transcript", ""]}, 0, SESSION_PREVIEW_CHARS]}]},
+    "chat_count": {"$ifNull": ["$chat_count", {"$size": {"$ifNull": ["$chat_messages", {"$ifNull": ["$chat", []]}]}}]},
+    "has_summary": _not_empty("summary"),
+    "has_terminologies": _not_empty("terminologies"),
+    "has_qa": _not_empty("qa_pairs")
+}
+
+def _encode_cursor(session: dict) -> str:
+    raw = f"{session['timestamp'].isoformat()}|{session['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> dict:
+    """Keyset filter for the page after `cursor` (newest first, ties broken by id)"""
+    try:
+        timestamp, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        timestamp = datetime.fromisoformat(timestamp)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "id": {"$lt": session_id}}
+    ]}
+
 @router.get("/api/sessions")
-async def get_sessions():
-    if db.db is None: return {"sessions": []}
-    cursor = db.db.sessions.find().sort("timestamp", -1)
-    sessions = await cursor.to_list(length=100)
-    for s in sessions:
-        if "_id" in s:
-            s["_id"] = str(s["_id"])
-        
-        # Map chat_messages (DB) to chat (Frontend)
-        if "chat_messages" in s:
-            s["chat"] = s["chat_messages"]
-        elif "chat" not in s:
-            s["chat"] = []
-            
-        # Ensure name exists
-        if "name" not in s or not s["name"]:
-            s["name"] = "Untitled Session"
-            
-        # Ensure transcript exists
-        if "transcript" not in s:
-            s["transcript"] = ""
-            
-    return {"sessions": sessions}
+async def get_sessions(limit: int = 20, cursor: Optional[str] = None):
+    """
+    One page of the History list (summary fields only; full documents via /api/sessions/{id}).
+    Pass the returned next_cursor to get the following page; it is null on the last one.
+    """
+    if db.db is None: return {"sessions": [], "next_cursor": None}
+    limit = max(1, min(limit, SESSION_PAGE_MAX))
+    pipeline = []
+    if cursor:
+        pipeline.append({"$match": _decode_cursor(cursor)})
+    pipeline += [
+        {"$sort": {"timestamp": -1, "id": -1}},
+        {"$limit": limit + 1},
+        {"$project": SESSION_LIST_PROJECTION}
+    ]
+    sessions = await db.db.sessions.aggregate(pipeline).to_list(length=limit + 1)
+    next_cursor = _encode_cursor(sessions[limit - 1]) if len(sessions) > limit else None
+    return {"sessions": sessions[:limit], "next_cursor": next_cursor}
 
 @router.get("/api/sessions/{session_id}")
 async def get_session(session_id: str):
     if db.db is None: raise HTTPException(status_code=503, detail="DB Error")
-    session = await db.db.sessions.find_one({"id": session_id})
+    session = await session_store.get_header(session_id)
     if session:
-        if "_id" in session: session["_id"] = str(session["_id"])
-        
-        # Map chat_messages to chat
-        if "chat_messages" in session:
-            session["chat"] = session["chat_messages"]
-        elif "chat" not in session:
-             session["chat"] = []
-             
+        # Reassemble the split document; chat is also returned as chat_messages as before
+        session["transcript"] = await session_store.get_transcript(session_id) or ""
+        session["chat"] = session["chat_messages"] = await session_store.get_chat(session_id)
         return {"session": session}
     raise HTTPException(status_code=404, detail="Session not found")
 
+@router.get("/api/sessions/{session_id}/transcript")
+async def get_session_transcript(session_id: str):
+    if db.db is None: raise HTTPException(status_code=503, detail="DB Error")
+    transcript = await session_store.get_transcript(session_id)
+    if transcript is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "transcript": transcript}
+
+@router.get("/api/sessions/{session_id}/chat")
+async def get_session_chat(session_id: str):
+    if db.db is None: raise HTTPException(status_code=503, detail="DB Error")
+    if await session_store.get_header(session_id, ["id"]) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "chat": await session_store.get_chat(session_id)}
+
 @router.delete("/api/sessions/{session_id}")
 async def delete_session(session_id: str):
     if db.db is None: raise HTTPException(status_code=503, detail="DB Error")
-    result = await db.db.sessions.delete_one({"id": session_id})
-    if result.deleted_count:
+    if await session_store.delete_session(session_id):
+        await search_index.remove_session(session_id)
         return {"success": True, "message": "Deleted"}
     raise HTTPException(status_code=404, detail="Not found")
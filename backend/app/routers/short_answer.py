@@ -1,19 +1,26 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from app.services.short_answer_service import ShortAnswerService
 from app.models.short_answer import ShortAnswerQuestionSet, GenerateShortAnswerRequest, EvaluateAnswerRequest, AnswerEvaluationResult
+from app.services.job_queue import job_queue, job_response
 from app.database import db
+from app.services import session_store
 
 router = APIRouter()
 
 @router.post("/api/analyze/generate-short-answer-questions", response_model=ShortAnswerQuestionSet)
 async def generate_short_answer_questions(request: GenerateShortAnswerRequest):
+    if request.background:
+        job = await job_queue.submit("short_answer", request.dict(), session_id=request.session_id)
+        return JSONResponse(status_code=202, content=job_response(job))
+    return await _generate_short_answer_questions(request)
+
+async def _generate_short_answer_questions(request: GenerateShortAnswerRequest):
     transcript = request.transcript_text
     
     if request.session_id and not transcript:
         if db.db is not None:
-            session = await db.db.sessions.find_one({"id": request.session_id})
-            if session:
-                transcript = session.get("transcript", "")
+            transcript = await session_store.get_transcript(request.session_id)
     
     if not transcript:
         raise HTTPException(status_code=400, detail="Transcript required")
@@ -27,6 +34,8 @@ async def generate_short_answer_questions(request: GenerateShortAnswerRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+job_queue.register("short_answer", lambda params: _generate_short_answer_questions(GenerateShortAnswerRequest(**params)))
+
 @router.post("/api/short-answer-questions/evaluate", response_model=AnswerEvaluationResult)
 async def evaluate_short_answer(request: EvaluateAnswerRequest):
     try:
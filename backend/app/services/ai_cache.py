@@ -0,0 +1,170 @@
+"""
+Response cache for AI generation calls.
+Two tiers: in-process LRU (always on) + optional MongoDB collection with TTL.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from app.config import settings
+from app.database import db
+
+
+def make_cache_key(model_name: str, prompt: str) -> str:
+    """Hash (model, prompt) with whitespace collapsed so re-indented prompts still match."""
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{model_name}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """Bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MongoCache:
+    """Shared tier in the `ai_cache` collection. Expiry via TTL index, size bounded on write."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def available(self) -> bool:
+        return db.db is not None
+
+    async def get(self, key: str) -> Optional[str]:
+        doc = await db.db.ai_cache.find_one(
+            {"key": key, "expires_at": {"$gt": datetime.utcnow()}},
+            {"_id": 0, "value": 1}
+        )
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: str, model_name: str):
+        now = datetime.utcnow()
+        await db.db.ai_cache.update_one(
+            {"key": key},
+            {"$set": {
+                "value": value,
+                "model_name": model_name,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl_seconds)
+            }},
+            upsert=True
+        )
+        await self._evict()
+
+    async def delete(self, key: str):
+        await db.db.ai_cache.delete_one({"key": key})
+
+    async def _evict(self):
+        """Drop the oldest entries once the collection grows past max_entries."""
+        count = await db.db.ai_cache.estimated_document_count()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        cursor = db.db.ai_cache.find({}, {"_id": 1}).sort("created_at", 1).limit(overflow)
+        stale_ids = [doc["_id"] async for doc in cursor]
+        if stale_ids:
+            await db.db.ai_cache.delete_many({"_id": {"$in": stale_ids}})
+
+
+class AICache:
+    """
+    Content-addressed cache in front of AIService.
+
+    Lookups go memory -> Mongo; a Mongo hit is promoted into memory.
+    Mongo errors are logged and treated as misses so the cache never breaks generation.
+    """
+
+    def __init__(self):
+        self.enabled = settings.AI_CACHE_ENABLED
+        self.memory = MemoryCache(settings.AI_CACHE_MAX_ENTRIES, settings.AI_CACHE_TTL_SECONDS)
+        self.mongo = MongoCache(settings.AI_CACHE_MONGO_MAX_ENTRIES, settings.AI_CACHE_TTL_SECONDS) \
+            if settings.AI_CACHE_MONGO_ENABLED else None
+
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+
+    def _mongo_ready(self) -> bool:
+        return self.mongo is not None and self.mongo.available
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        if self._mongo_ready():
+            try:
+                value = await self.mongo.get(key)
+            except Exception as e:
+                print(f"⚠️ AI cache read error: {e}")
+                value = None
+            if value is not None:
+                self.mongo_hits += 1
+                self.memory.set(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str, model_name: str):
+        self.memory.set(key, value)
+        if self._mongo_ready():
+            try:
+                await self.mongo.set(key, value, model_name)
+            except Exception as e:
+                print(f"⚠️ AI cache write error: {e}")
+
+    async def invalidate(self, key: str):
+        self.memory.delete(key)
+        if self._mongo_ready():
+            try:
+                await self.mongo.delete(key)
+            except Exception as e:
+                print(f"⚠️ AI cache delete error: {e}")
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.mongo_hits
+        total = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "mongo_tier": self._mongo_ready()
+        }
+
+
+ai_cache = AICache()
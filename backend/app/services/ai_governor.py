@@ -0,0 +1,115 @@
+"""
+Concurrency governor for outbound AI calls.
+Bounded semaphore + token buckets for requests/min and tokens/min, so bursts
+queue up locally instead of turning into 429 storms from Gemini.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from app.config import settings
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars per token) used before the real count is known."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at capacity per minute."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def take(self, amount: float):
+        # A single request larger than the bucket would wait forever; cap it
+        amount = min(amount, self.capacity)
+        # The lock keeps waiters FIFO so large requests aren't starved by small ones
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Charge (or refund) the difference once the real usage is known. May go negative."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AIGovernor:
+    def __init__(self, max_concurrent: int, requests_per_minute: int, tokens_per_minute: int):
+        self.max_concurrent = max_concurrent
+        # Like the buckets, 0 (or less) means no limit
+        self._semaphore: Optional[asyncio.Semaphore] = asyncio.Semaphore(max_concurrent) if max_concurrent > 0 else None
+        self.request_bucket: Optional[TokenBucket] = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket: Optional[TokenBucket] = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+        self.waiting = 0
+        self.active = 0
+        self.acquired = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """Wait for rate-limit budget and a free concurrency slot, then hold the slot."""
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            if self.request_bucket:
+                await self.request_bucket.take(1)
+            if self.token_bucket:
+                await self.token_bucket.take(estimated_tokens)
+            if self._semaphore:
+                await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.acquired += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.completed += 1
+            if self._semaphore:
+                self._semaphore.release()
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if self.token_bucket and actual_tokens:
+            self.token_bucket.adjust(actual_tokens - estimated_tokens)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent if self._semaphore else None,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 1) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "requests_per_minute": int(self.request_bucket.capacity) if self.request_bucket else None,
+            "tokens_per_minute": int(self.token_bucket.capacity) if self.token_bucket else None
+        }
+
+
+ai_governor = AIGovernor(
+    max_concurrent=settings.AI_MAX_CONCURRENT,
+    requests_per_minute=settings.AI_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.AI_TOKENS_PER_MINUTE
+)
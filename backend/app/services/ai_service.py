@@ -5,8 +5,12 @@ with warnings.catch_warnings():
     warnings.simplefilter("ignore", category=FutureWarning)
     import google.generativeai as genai
 from app.config import settings
+from app.services.ai_cache import ai_cache, make_cache_key
+from app.services.ai_governor import ai_governor, estimate_tokens
+import asyncio
 import json
 import re
+from typing import AsyncIterator, Awaitable, Callable, Dict
 
 # Configure Gemini
 try:
@@ -17,25 +21,144 @@ try:
 except Exception as e:
     print(f"❌ Failed to configure Gemini: {e}")
 
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key onto one in-flight task.
+    The first caller starts the work in its own task; everyone arriving before
+    it finishes (the first caller included) awaits the same result or exception.
+    Callers await it shielded, so a cancelled caller (e.g. a client that
+    disconnected) leaves the shared call running for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            self.leaders += 1
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark retrieved so asyncio doesn't warn when every caller had gone away
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
+
+
+_single_flight = SingleFlight()
+
+# GenerativeModel instances are stateless per call, so one per model name is enough
+_models: Dict[str, "genai.GenerativeModel"] = {}
+
+
+def get_model(model_name: str) -> "genai.GenerativeModel":
+    model = _models.get(model_name)
+    if model is None:
+        model = genai.GenerativeModel(model_name)
+        _models[model_name] = model
+    return model
+
+
 class AIService:
     @staticmethod
-    async def generate_content(prompt: str, model_name: str = "gemini-2.5-flash") -> str:
+    async def generate_content(prompt: str, model_name: str = "gemini-2.5-flash", use_cache: bool = True) -> str:
         """
         Generate text content from AI.
+        Identical (model, prompt) pairs are served from the response cache unless use_cache=False,
+        and concurrent identical calls share a single upstream request.
         """
+        cache_key = make_cache_key(model_name, prompt)
+        if use_cache and ai_cache.enabled:
+            cached = await ai_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        async def leader_call() -> str:
+            text = await AIService._call_model(prompt, model_name)
+            # Only the leader writes the cache; coalesced callers just share the result
+            if use_cache and ai_cache.enabled:
+                await ai_cache.set(cache_key, text, model_name)
+            return text
+        
         try:
-            model = genai.GenerativeModel(model_name)
+            return await _single_flight.do(cache_key, leader_call)
+        except Exception as e:
+            print(f"❌ AI Generation Error: {e}")
+            raise e
+
+    @staticmethod
+    async def _call_model(prompt: str, model_name: str) -> str:
+        model = get_model(model_name)
+        estimated = estimate_tokens(prompt)
+        async with ai_governor.slot(estimated):
             # Gemini async generation is run in a thread pool executor usually,
             # or we can use the async method if available in recent versions.
             # For `google-generativeai`, `generate_content_async` allows awaiting.
             response = await model.generate_content_async(prompt)
-            return response.text
+        usage = getattr(response, "usage_metadata", None)
+        ai_governor.record_usage(estimated, getattr(usage, "total_token_count", None))
+        return response.text
+
+    @staticmethod
+    async def stream_content(prompt: str, model_name: str = "gemini-2.5-flash", use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Stream text content from AI as it is generated.
+        A cache hit is yielded as a single chunk; a fresh stream is cached once complete.
+        Streams are not coalesced since each caller needs its own token feed.
+        """
+        cache_key = make_cache_key(model_name, prompt)
+        if use_cache and ai_cache.enabled:
+            cached = await ai_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        model = get_model(model_name)
+        estimated = estimate_tokens(prompt)
+        parts = []
+        try:
+            async with ai_governor.slot(estimated):
+                response = await model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield text
         except Exception as e:
-            print(f"❌ AI Generation Error: {e}")
+            print(f"❌ AI Stream Error: {e}")
             raise e
+        
+        usage = getattr(response, "usage_metadata", None)
+        ai_governor.record_usage(estimated, getattr(usage, "total_token_count", None))
+        if use_cache and ai_cache.enabled:
+            await ai_cache.set(cache_key, "".join(parts), model_name)
+
+    @staticmethod
+    def coalescing_stats() -> dict:
+        return _single_flight.stats()
+
+    @staticmethod
+    def governor_stats() -> dict:
+        return ai_governor.stats()
 
     @staticmethod
-    async def generate_json(prompt: str, model_name: str = "gemini-2.5-flash") -> dict:
+    async def generate_json(prompt: str, model_name: str = "gemini-2.5-flash", use_cache: bool = True) -> dict:
         """
         Generate and parse JSON content from AI.
         Wraps the prompt to ensure JSON output and handles cleaning.
@@ -49,7 +172,7 @@ class AIService:
         """
         
         try:
-            text = await AIService.generate_content(json_prompt, model_name)
+            text = await AIService.generate_content(json_prompt, model_name, use_cache=use_cache)
             
             # Clean potential markdown
             cleaned_text = text.strip()
@@ -66,6 +189,9 @@ class AIService:
             return json.loads(cleaned_text)
         except json.JSONDecodeError as e:
             print(f"❌ JSON Parse Error. Response was: {text[:200]}...")
+            # Don't keep serving a malformed response from cache
+            if use_cache:
+                await ai_cache.invalidate(make_cache_key(model_name, json_prompt))
             raise ValueError(f"Failed to parse AI response as JSON: {e}")
         except Exception as e:
             print(f"❌ AI JSON Generation Error: {e}")
@@ -1,94 +1,116 @@
 """
 Real-time Audio Transcription using OnDemand.io Speech-to-Text API
-PARALLEL VERSION: Continuous recording with async transcription
+ASYNC VERSION: chunks flow through an asyncio pipeline on the server's event loop
 """
-import os
+import asyncio
+import io
+import random
 import threading
 import time
-import tempfile
-import queue
 import base64
-from typing import Callable, Optional, Union
+import wave
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import httpx
 import numpy as np
-import requests
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.services.chunk_queue import ChunkQueue
+from app.services.stt_backends import STTBackend, STTRetryableError, create_stt_backend
+from app.services.sequencer import ReorderBuffer
+from app.services.vad import VAD_AVAILABLE, WEBRTCVAD_AVAILABLE, SpeechChunker, WebMDecoder
+from app.utils.stitching import NearDuplicateFilter
 
 # Load environment variables
 load_dotenv()
 
 try:
     import sounddevice as sd
-    import soundfile as sf
     AUDIO_AVAILABLE = True
 except (ImportError, OSError):
     AUDIO_AVAILABLE = False
     print("⚠️  Audio libraries not available (Server mode)")
 
-# Try to import Cloudinary
-try:
-    import cloudinary
-    import cloudinary.uploader
-    CLOUDINARY_AVAILABLE = True
-except ImportError:
-    CLOUDINARY_AVAILABLE = False
-    print("⚠️  Cloudinary not available")
+# A browser chunk whose decode skips more stream time than this is sent to STT undecoded
+MAX_DECODE_GAP_SECONDS = 0.25
 
 
 class AudioTranscriber:
     """
     Real-time bilingual (Hindi + English) audio transcription.
     
-    Uses parallel processing:
-    - Recording thread: Continuously captures audio chunks
-    - Transcription thread: Processes chunks in parallel
-    - No audio is missed during transcription delays
+    Pipeline (all on the event loop except local mic capture):
+    - Chunks (WebSocket audio, or the mic capture thread) go onto an asyncio.Queue
+    - A few worker tasks per session upload them concurrently, bounded
+      server-wide by a shared semaphore, retrying transient failures
+    - The sequencer hands transcripts to the callback in chunk order
     """
     
-    def __init__(self, chunk_duration: float = 4.0, sample_rate: int = 16000):
+    def __init__(
+        self,
+        chunk_duration: float = 4.0,
+        sample_rate: int = 16000,
+        backend: Optional[STTBackend] = None,
+        capture_local: bool = True
+    ):
         self.chunk_duration = chunk_duration
         self.sample_rate = sample_rate
         self.is_recording = False
         self.callback = None
+        # Only one session may own the server microphone; the rest take WebSocket audio only
+        self.capture_local = capture_local
         
-        # Thread management
-        self.recording_thread = None
-        self.processing_thread = None
-        self.audio_queue = queue.Queue(maxsize=10)  # Buffer for audio chunks
-        self.executor = ThreadPoolExecutor(max_workers=3)  # Parallel transcription
+        # Task management
+        self.recording_thread: Optional[threading.Thread] = None
+        self.audio_queue: Optional[ChunkQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
         # Audio settings
         self.silence_threshold = 0.002
         
-        # OnDemand API
-        self.api_key = os.getenv("ONDEMAND_API_KEY")
-        self.api_url = "https://api.on-demand.io/services/v1/public/service/execute/speech_to_text"
+        # Speech-to-text backend (STT_BACKEND env: ondemand / inline / stub)
+        self.backend = backend or get_stt_backend()
+        self.available = self.backend.available
         
-        # Cloudinary configuration
-        cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
-        api_key = os.getenv("CLOUDINARY_API_KEY")
-        api_secret = os.getenv("CLOUDINARY_API_SECRET")
+        # Decode WebSocket WebM to PCM and re-cut it at pauses; silence is never uploaded.
+        # The local mic gets its own chunker so the two streams are never spliced together.
+        self.decoder = WebMDecoder(sample_rate)
+        self.chunker = self._make_chunker() if VAD_AVAILABLE else None
+        self.local_chunker = self._make_chunker() if WEBRTCVAD_AVAILABLE else None
+        # The decoder and chunker are used from a worker thread; one user at a time
+        # (every socket in a session feeds the same chunker, and stop flushes it)
+        self._audio_lock = asyncio.Lock()
         
-        self.cloudinary_configured = False
-        if CLOUDINARY_AVAILABLE and cloud_name and api_key and api_secret:
-            if cloud_name != "your_cloud_name":
-                cloudinary.config(
-                    cloud_name=cloud_name,
-                    api_key=api_key,
-                    api_secret=api_secret
-                )
-                self.cloudinary_configured = True
-                print("✅ Cloudinary configured")
+        # Chunks are numbered as they are queued and their transcripts released in that order
+        self.sequencer = ReorderBuffer(self._release_transcript, timeout=settings.STT_REORDER_TIMEOUT_SECONDS)
+        # (start, end) wall-clock time of the audio in each queued chunk, for segment timestamps
+        self._chunk_times: Dict[int, Tuple[float, float]] = {}
+        # Trims words repeated across overlapping chunks and drops near-duplicate segments
+        self.deduper = NearDuplicateFilter(
+            window=settings.DEDUPE_WINDOW_SEGMENTS,
+            threshold=settings.DEDUPE_SIMILARITY
+        )
         
-        self.available = self.cloudinary_configured and self.api_key
-        if self.available:
-            print("✅ OnDemand transcription ready")
+        self.retries = 0
         
-        # Track transcriptions
-        self.sent_transcripts = set()
-        self.pending_futures = []
+        # Control messages for this session's clients (e.g. backpressure), set by the owner
+        self.on_control: Optional[Callable[[dict], None]] = None
+        self.slowed_down = False
         
-        print(f"📝 AudioTranscriber ready (parallel mode, chunk={chunk_duration}s)")
+        print(f"📝 AudioTranscriber ready (async mode, chunk={chunk_duration}s)")
+    
+    def _make_chunker(self) -> Optional[SpeechChunker]:
+        if not settings.VAD_ENABLED:
+            return None
+        return SpeechChunker(
+            sample_rate=self.sample_rate,
+            aggressiveness=settings.VAD_AGGRESSIVENESS,
+            min_seconds=settings.CHUNK_MIN_SECONDS,
+            max_seconds=settings.CHUNK_MAX_SECONDS,
+            pause_ms=settings.CHUNK_PAUSE_MS,
+            overlap_ms=settings.CHUNK_OVERLAP_MS,
+            silence_ratio=settings.VAD_SILENCE_RATIO
+        )
     
     def _normalize_audio(self, audio_data: np.ndarray) -> np.ndarray:
         """Normalize audio volume."""
@@ -97,100 +119,137 @@ class AudioTranscriber:
             return audio_data * (0.7 / max_val)
         return audio_data
     
-    def _upload_and_transcribe(self, audio_data: Union[np.ndarray, bytes], chunk_id: int) -> Optional[str]:
-        """Upload audio to Cloudinary and transcribe via OnDemand API."""
-        tmp_path = None
+    def _encode_audio(self, audio_data: Union[np.ndarray, bytes]) -> Tuple[bytes, str]:
+        """Return (encoded bytes, format) without touching disk."""
+        # Handle WebM bytes (from frontend)
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            return bytes(audio_data), "webm"
+        
+        # Handle Numpy array (local mic or decoded WebSocket audio).
+        # Written with the stdlib wave module so server mode doesn't need soundfile.
+        pcm = (np.clip(self._normalize_audio(audio_data), -1.0, 1.0) * 32767).astype(np.int16)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(pcm.tobytes())
+        return buffer.getvalue(), "wav"
+    
+    async def _transcribe_with_retry(self, audio: bytes, audio_format: str, chunk_id: int) -> Optional[str]:
+        """Call the backend, retrying timeouts, connection errors and 429/5xx with jittered backoff."""
+        for attempt in range(settings.STT_MAX_RETRIES + 1):
+            try:
+                async with get_stt_slots():
+                    return await self.backend.transcribe(audio, audio_format, chunk_id)
+            except (STTRetryableError, httpx.TransportError) as e:
+                if attempt == settings.STT_MAX_RETRIES:
+                    raise
+                delay = settings.STT_RETRY_BASE_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+                self.retries += 1
+                print(f"   [{chunk_id}] {type(e).__name__}: {e} - retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    async def _upload_and_transcribe(self, audio_data: Union[np.ndarray, bytes], chunk_id: int) -> Optional[str]:
+        """Transcribe one chunk through the configured STT backend."""
         try:
-            # Handle WebM bytes (from frontend)
-            if isinstance(audio_data, bytes):
-                with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f:
-                    tmp_path = f.name
-                    f.write(audio_data)
-            else:
-                # Handle Numpy array (from local mic)
-                audio_data = self._normalize_audio(audio_data)
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-                    tmp_path = f.name
-                    sf.write(tmp_path, audio_data, self.sample_rate)
-            
-            # Determine resource type (Cloudinary treats WebM as video, but raw is safer for chunks)
-            resource_type = "raw" if tmp_path.endswith(".webm") else "auto"
-            
-            # Upload to Cloudinary
-            result = cloudinary.uploader.upload(
-                tmp_path,
-                resource_type=resource_type,
-                folder="stt_audio",
-                # format="wav"  # Let Cloudinary handle format for WebM
-            )
-            audio_url = result.get("secure_url")
+            audio, audio_format = self._encode_audio(audio_data)
+            transcript = await self._transcribe_with_retry(audio, audio_format, chunk_id)
             
-            if not audio_url:
-                return None
-            
-            print(f"   [{chunk_id}] Uploaded, transcribing...")
-            
-            # Call OnDemand API
-            headers = {
-                "apikey": self.api_key,
-                "Content-Type": "application/json"
-            }
-            payload = {"audioUrl": audio_url}
-            
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=45
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                transcript = result.get("data", {}).get("text", "").strip()
+            if transcript:
+                # Filter noise
+                noise_words = ["uh", "um", "hmm", "ah", "oh", "mm", "in", "and", "अं", "हं", "हाँ", "उं"]
+                if transcript.lower() in noise_words or len(transcript) < 2:
+                    return None
                 
-                if transcript:
-                    # Filter noise
-                    noise_words = ["uh", "um", "hmm", "ah", "oh", "mm", "in", "and", "अं", "हं", "हाँ", "उं"]
-                    if transcript.lower() in noise_words or len(transcript) < 2:
-                        return None
-                    
-                    return transcript
+                return transcript
             
             return None
-                
+        
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             print(f"   [{chunk_id}] Error: {e}")
             return None
-        finally:
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
     
-    def _handle_transcription_result(self, future, chunk_id: int):
-        """Handle completed transcription."""
-        try:
-            transcript = future.result()
-            if transcript:
-                clean = transcript.lower().strip()
-                if clean not in self.sent_transcripts:
-                    self.sent_transcripts.add(clean)
-                    print(f"✅ [{chunk_id}] \"{transcript}\"")
-                    if self.callback:
-                        self.callback(transcript)
-        except Exception as e:
-            print(f"❌ [{chunk_id}] Failed: {e}")
+    def _release_transcript(self, chunk_id: int, transcript: str):
+        """Called by the sequencer, one chunk at a time, in chunk order."""
+        start, end = self._chunk_times.pop(chunk_id, (None, None))
+        transcript = self.deduper.filter(transcript)
+        if not transcript:
+            return
+        print(f"✅ [{chunk_id}] \"{transcript}\"")
+        if self.callback:
+            self.callback(transcript, chunk_id=chunk_id, start=start, end=end)
+    
+    def _enqueue(self, audio_data: Union[np.ndarray, bytes]) -> Optional[int]:
+        """
+        Number a chunk and queue it for transcription (event loop only, never blocks).
+        Returns its sequence number (the merged-into chunk's when coalesced).
+        """
+        q = self.audio_queue
+        if q is None:
+            return None
+        now = time.time()
+        
+        if q.at_capacity():
+            if q.policy == "coalesce":
+                merged = q.coalesce_last(lambda item: self._merge_chunks(item, audio_data))
+                if merged is not None:
+                    start, _ = self._chunk_times.get(merged[1], (now, now))
+                    self._chunk_times[merged[1]] = (start, now)
+                    print(f"🔗 [{merged[1]}] Queue full, coalesced with newest chunk")
+                    return merged[1]
+            _, old_id = q.drop_oldest()
+            self._chunk_times.pop(old_id, None)
+            self.sequencer.complete(old_id, None)
+            print(f"⚠️ [{old_id}] Queue full, dropped oldest chunk")
+        
+        chunk_id = self.sequencer.next_seq()
+        # PCM chunks end now and last len/sample_rate; raw WebM length is unknown
+        duration = len(audio_data) / self.sample_rate if isinstance(audio_data, np.ndarray) else 0.0
+        self._chunk_times[chunk_id] = (now - duration, now)
+        q.put_chunk((audio_data, chunk_id))
+        self._check_backpressure()
+        return chunk_id
+    
+    def _merge_chunks(self, item: tuple, audio_data: Union[np.ndarray, bytes]) -> Optional[tuple]:
+        """Join a queued PCM chunk with a new one, unless either is raw WebM or the result is too long."""
+        queued_audio, chunk_id = item
+        if not isinstance(queued_audio, np.ndarray) or not isinstance(audio_data, np.ndarray):
+            return None
+        if (len(queued_audio) + len(audio_data)) / self.sample_rate > settings.STT_COALESCE_MAX_SECONDS:
+            return None
+        return np.concatenate([queued_audio, audio_data]), chunk_id
+    
+    def _check_backpressure(self):
+        """slow_down policy: tell clients to hold audio back near capacity, and to resume once drained."""
+        q = self.audio_queue
+        if q is None or q.policy != "slow_down" or self.on_control is None:
+            return
+        depth = q.qsize()
+        if not self.slowed_down and depth >= max(1, q.limit * 3 // 4):
+            self.slowed_down = True
+            self.on_control({"type": "backpressure", "action": "slow_down", "queue_depth": depth})
+        elif self.slowed_down and depth <= q.limit // 4:
+            self.slowed_down = False
+            self.on_control({"type": "backpressure", "action": "resume", "queue_depth": depth})
+    
+    def _enqueue_from_thread(self, audio_data: np.ndarray):
+        """Hand a chunk from the mic capture thread to the event loop."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._enqueue, audio_data)
     
     def _recording_loop(self):
         """
-        RECORDING THREAD: Continuously captures audio chunks.
-        Never stops to wait for transcription.
+        RECORDING THREAD: Continuously captures audio from the local mic.
+        sounddevice is blocking, so this is the one part that stays on a thread.
         """
         print("🎧 Recording thread started (continuous capture)")
         
-        chunk_samples = int(self.chunk_duration * self.sample_rate)
-        chunk_id = 0
+        # With a speech chunker, record short blocks and let it decide where chunks end
+        block_seconds = 1.0 if self.local_chunker else self.chunk_duration
+        chunk_samples = int(block_seconds * self.sample_rate)
         
         while self.is_recording:
             try:
@@ -207,83 +266,129 @@ class AudioTranscriber:
                     break
                 
                 audio_data = audio_data.flatten()
-                chunk_id += 1
+                
+                if self.local_chunker:
+                    pcm = (np.clip(audio_data, -1.0, 1.0) * 32767).astype(np.int16)
+                    for chunk in self.local_chunker.feed(pcm):
+                        print(f"🎤 Speech chunk ({len(chunk) / self.sample_rate:.1f}s)")
+                        self._enqueue_from_thread(self._pcm_to_float(chunk))
+                    continue
                 
                 # Check audio level
                 rms = np.sqrt(np.mean(audio_data ** 2))
                 
                 if rms < self.silence_threshold:
-                    print(f"⏸️ [{chunk_id}] Silence")
+                    print("⏸️ Silence")
                     continue
                 
-                print(f"🎤 [{chunk_id}] Recording... (RMS: {rms:.4f})")
-                
-                # Put in queue for processing (non-blocking)
-                try:
-                    self.audio_queue.put_nowait((audio_data.copy(), chunk_id))
-                except queue.Full:
-                    print(f"⚠️ [{chunk_id}] Queue full, skipping")
+                print(f"🎤 Recording... (RMS: {rms:.4f})")
+                self._enqueue_from_thread(audio_data.copy())
                     
             except Exception as e:
                 print(f"❌ Recording error: {e}")
                 time.sleep(0.5)
         
+        tail = self.local_chunker.flush() if self.local_chunker else None
+        if tail is not None:
+            self._enqueue_from_thread(self._pcm_to_float(tail))
+        
         print("📝 Recording thread stopped")
     
-    def _processing_loop(self):
-        """
-        PROCESSING THREAD: Takes chunks from queue and transcribes in parallel.
-        Uses ThreadPoolExecutor for concurrent API calls.
-        """
-        print("🔄 Processing thread started (parallel transcription)")
-        
-        while self.is_recording or not self.audio_queue.empty():
+    async def _worker(self):
+        """Take chunks off the queue and transcribe them; several run per session."""
+        while True:
+            audio_data, chunk_id = await self.audio_queue.get()
+            self._check_backpressure()
             try:
-                # Get chunk from queue (with timeout)
-                try:
-                    audio_data, chunk_id = self.audio_queue.get(timeout=1.0)
-                except queue.Empty:
-                    continue
-                
-                # Submit for parallel transcription
                 print(f"📤 [{chunk_id}] Uploading...")
-                future = self.executor.submit(
-                    self._upload_and_transcribe, 
-                    audio_data, 
-                    chunk_id
-                )
-                
-                # Add callback for when done
-                future.add_done_callback(
-                    lambda f, cid=chunk_id: self._handle_transcription_result(f, cid)
-                )
-                
+                transcript = await self._upload_and_transcribe(audio_data, chunk_id)
+                self.sequencer.complete(chunk_id, transcript)
+            finally:
                 self.audio_queue.task_done()
-                    
-            except Exception as e:
-                print(f"❌ Processing error: {e}")
+    
+    async def _reorder_watchdog(self):
+        """Let results stuck behind a slow chunk go once it passes the reorder timeout."""
+        while True:
+            await asyncio.sleep(1.0)
+            self.sequencer.poll()
+    
+    def _chunk_external_audio(self, audio_bytes: bytes, codec: str = "webm") -> List[Union[np.ndarray, bytes]]:
+        """Run a browser chunk through the speech chunker. Returns the chunks to upload now."""
+        if codec == "pcm16":
+            # Already 16 kHz mono s16le: no decode needed
+            pcm = np.frombuffer(audio_bytes, dtype="<i2")
+            if self.chunker is None:
+                return [self._pcm_to_float(pcm)]
+            return [self._pcm_to_float(c) for c in self.chunker.feed(pcm)]
+        
+        if self.chunker is None:
+            return [self.decoder.container_bytes(audio_bytes)]
+        
+        pcm = self.decoder.decode(audio_bytes)
+        if pcm is None:
+            # Can't judge it; send it as-is rather than lose speech
+            return [self.decoder.container_bytes(audio_bytes)]
+        if self.decoder.last_gap > MAX_DECODE_GAP_SECONDS:
+            # Part of the slice didn't decode; the chunker would splice the hole into speech
+            print(f"⚠️ {self.decoder.last_gap:.1f}s of audio missing after decode; sending chunk as-is")
+            return [self.decoder.container_bytes(audio_bytes)]
         
-        print("📝 Processing thread stopped")
+        chunks = self.chunker.feed(pcm)
+        ratio = self.chunker.last_speech_ratio
+        if not chunks:
+            print(f"⏸️ Buffering (speech {ratio:.0%})")
+        return [self._pcm_to_float(c) for c in chunks]
     
-    def process_external_audio(self, base64_audio: str):
-        """Process audio chunk received from frontend."""
+    @staticmethod
+    def _pcm_to_float(pcm: np.ndarray) -> np.ndarray:
+        return pcm.astype(np.float32) / 32768.0
+    
+    async def process_external_audio(self, base64_audio: str):
+        """Process a base64 audio chunk received from the frontend as JSON."""
+        if not self.is_recording:
+            return
         try:
             audio_bytes = base64.b64decode(base64_audio)
-            # Use a timestamp-based ID or incrementing ID if possible, for now random/time is fine
-            # But main loop logic uses incrementing. Let's just use time for unique ID logging or manage ID in main
-            # Actually, let's keep it simple.
-            chunk_id = int(time.time() * 1000) 
-            
-            self.audio_queue.put((audio_bytes, chunk_id))
+        except Exception as e:
+            print(f"❌ Error decoding external audio: {e}")
+            return
+        await self.process_audio_bytes(audio_bytes)
+    
+    async def process_audio_bytes(self, audio_bytes: bytes, codec: str = "webm"):
+        """Process a raw audio chunk (binary WebSocket frame payload): WebM/Opus or pcm16."""
+        if not self.is_recording:
+            return
+        try:
+            # Decoding and VAD are CPU work; run them off the loop, one chunk at a time per session
+            async with self._audio_lock:
+                chunks = await asyncio.to_thread(self._chunk_external_audio, audio_bytes, codec)
+            if not self.is_recording:
+                return  # stopped while this chunk was decoding
+            for audio in chunks:
+                chunk_id = self._enqueue(audio)
+                print(f"🎤 [{chunk_id}] Speech chunk queued")
         except Exception as e:
             print(f"❌ Error processing external audio: {e}")
+    
+    def vad_stats(self) -> Optional[dict]:
+        return self.chunker.stats() if self.chunker else None
+    
+    def dedupe_stats(self) -> dict:
+        return self.deduper.stats()
+    
+    def sequencing_stats(self) -> dict:
+        return {**self.sequencer.stats(), "retries": self.retries}
+    
+    def queue_stats(self) -> Optional[dict]:
+        if self.audio_queue is None:
+            return None
+        return {**self.audio_queue.stats(), "slowed_down": self.slowed_down}
 
-    def start_recording(self, callback: Callable[[str], None]) -> bool:
-        """Start parallel recording and transcription."""
-        # if not AUDIO_AVAILABLE:
-        #    print("❌ Audio not available")
-        #    return False
-        
+    async def start_recording(self, callback: Callable[..., None], local_audio: bool = True) -> bool:
+        """
+        Start recording and the transcription workers on the running event loop.
+        local_audio=False takes WebSocket audio only (e.g. started by another worker).
+        """
         if not self.available:
             print("❌ Transcription not configured")
             return False
@@ -293,21 +398,23 @@ class AudioTranscriber:
         
         self.callback = callback
         self.is_recording = True
-        self.sent_transcripts.clear()
-        
-        # Clear queue
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except:
-                pass
+        self.deduper.reset()
+        self.retries = 0
+        self.sequencer.reset()
+        self._chunk_times.clear()
+        self.decoder.reset()
+        for chunker in (self.chunker, self.local_chunker):
+            if chunker:
+                chunker.reset()
         
-        # Start processing thread (ALWAYS)
-        self.processing_thread = threading.Thread(target=self._processing_loop, daemon=True)
-        self.processing_thread.start()
+        self._loop = asyncio.get_running_loop()
+        self.slowed_down = False
+        self.audio_queue = ChunkQueue(settings.STT_QUEUE_MAX, settings.STT_BACKPRESSURE_POLICY)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(settings.STT_SESSION_CONCURRENCY)]
+        self._workers.append(asyncio.create_task(self._reorder_watchdog()))
 
         # Start recording thread ONLY if local audio is available
-        if AUDIO_AVAILABLE:
+        if AUDIO_AVAILABLE and self.capture_local and local_audio:
             self.recording_thread = threading.Thread(target=self._recording_loop, daemon=True)
             self.recording_thread.start()
             print("🎤 Local Microphone Recording started")
@@ -316,39 +423,67 @@ class AudioTranscriber:
             
         return True
     
-    def stop_recording(self):
-        """Stop recording and finish processing."""
+    async def stop_recording(self):
+        """
+        Stop recording, give queued chunks up to STT_STOP_DRAIN_SECONDS to finish,
+        then cancel whatever is left. Nothing from this recording runs after it returns.
+        """
         if not self.is_recording:
             return
         
         self.is_recording = False
         print("🛑 Stopping...")
         
-        # Wait for threads
+        # The mic thread ends after its current block and flushes its chunker onto the loop
         if self.recording_thread:
-            self.recording_thread.join(timeout=2)
-        if self.processing_thread:
-            self.processing_thread.join(timeout=5)
+            await asyncio.to_thread(self.recording_thread.join)
+            self.recording_thread = None
+            await asyncio.sleep(0)  # run the call_soon_threadsafe hand-offs it queued
         
-        self.recording_thread = None
-        self.processing_thread = None
+        # Speech still buffered in the WebSocket chunker would otherwise be lost
+        async with self._audio_lock:
+            tail = self.chunker.flush() if self.chunker else None
+        if tail is not None:
+            self._enqueue(self._pcm_to_float(tail))
+        
+        try:
+            await asyncio.wait_for(self.audio_queue.join(), timeout=settings.STT_STOP_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {self.sequencer.stats()['in_flight']} chunk(s) not transcribed before stop")
+        
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # Anything held for ordering is complete now; release it
+        self.sequencer.flush()
         
         print("✅ Stopped")
 
 
-# Global instance
-_transcriber: Optional[AudioTranscriber] = None
+# Shared across sessions: one backend client and one cap on STT calls in flight
+_backend: Optional[STTBackend] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def get_stt_backend() -> STTBackend:
+    """Get the configured speech-to-text backend."""
+    global _backend
+    if _backend is None:
+        _backend = create_stt_backend()
+        if _backend.available:
+            print(f"✅ Transcription ready (backend: {_backend.name})")
+    return _backend
 
 
-def get_transcriber() -> AudioTranscriber:
-    """Get transcriber instance."""
-    global _transcriber
-    if _transcriber is None:
-        _transcriber = AudioTranscriber()
-    return _transcriber
+def get_stt_slots() -> asyncio.Semaphore:
+    """Semaphore bounding concurrent STT calls across every session."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.STT_MAX_WORKERS)
+    return _slots
 
 
 def is_ondemand_available() -> bool:
-    """Check if OnDemand transcription is available."""
-    transcriber = get_transcriber()
-    return transcriber.available
+    """Check if the configured transcription backend is available."""
+    return get_stt_backend().available
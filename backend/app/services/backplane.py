@@ -0,0 +1,277 @@
+"""
+Pub/sub backplane so live-session events reach clients on every server worker.
+Every WebSocket message for a topic (a live session, or None for everyone) is
+published here: it is delivered to this worker's clients at once and sent to
+the other workers, which deliver it to theirs and mirror it into their own copy
+of the session (transcript segments, recording status, rolling summary).
+
+BACKPLANE env:
+- memory: single process (default); nothing leaves the worker
+- unix:   workers on one host talk through a small broker on a Unix socket;
+          whichever worker holds the lock file runs the broker, and another
+          takes over if it exits
+- mongo:  events go through a MongoDB collection watched with a change stream
+          (needs a replica set; falls back to memory without a database)
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Type
+from app.config import settings
+from app.database import db
+from app.state import manager
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# Identifies this worker's events so it doesn't deliver its own messages twice
+PROCESS_ID = uuid.uuid4().hex
+
+RemoteHandler = Callable[[Optional[str], dict], None]
+
+
+class Backplane:
+    """In-memory backplane: local delivery only. Subclasses also reach other workers."""
+
+    name = "memory"
+
+    def __init__(self):
+        # Called for events from other workers before they go to local clients
+        self.remote_handlers: List[RemoteHandler] = []
+        self.published = 0
+        self.received = 0
+        self.send_errors = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, topic: Optional[str], message: dict):
+        """Deliver to this worker's subscribers now, then to the other workers."""
+        self.published += 1
+        await manager.broadcast(message, topic=topic)
+        try:
+            await self._send({"origin": PROCESS_ID, "topic": topic, "message": message})
+        except Exception as e:
+            self.send_errors += 1
+            print(f"⚠️ Backplane publish failed: {e}")
+
+    async def _send(self, envelope: dict):
+        pass
+
+    async def _receive(self, envelope: dict):
+        if envelope.get("origin") == PROCESS_ID:
+            return
+        self.received += 1
+        topic, message = envelope.get("topic"), envelope.get("message") or {}
+        for handler in self.remote_handlers:
+            try:
+                handler(topic, message)
+            except Exception as e:
+                print(f"⚠️ Backplane handler error: {e}")
+        await manager.broadcast(message, topic=topic)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "published": self.published,
+            "received": self.received,
+            "send_errors": self.send_errors
+        }
+
+
+class UnixSocketBackplane(Backplane):
+    """Newline-delimited JSON through a broker on a Unix socket (one host, several workers)."""
+
+    name = "unix"
+    # A peer this far behind is dropped by the broker rather than buffered without limit
+    MAX_PEER_BUFFER = 8 * 1024 * 1024
+    MAX_LINE = 1024 * 1024
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._peer_tasks: Set[asyncio.Task] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._server:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            # Closing a peer ends its relay loop; let them finish before the loop goes away
+            await asyncio.gather(*self._peer_tasks, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    @property
+    def is_broker(self) -> bool:
+        return self._server is not None
+
+    async def _become_broker(self):
+        """Run the broker if no other worker holds the lock (the lock dies with its holder)."""
+        if self._server is not None:
+            return
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return
+        self._lock_fd = fd
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a broker that died
+        self._server = await asyncio.start_unix_server(self._serve_peer, path=self.path, limit=self.MAX_LINE)
+        print(f"📡 Backplane broker listening on {self.path}")
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Broker side: relay every line from one worker to all of them."""
+        task = asyncio.current_task()
+        self._peer_tasks.add(task)
+        self._peers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in list(self._peers):
+                    if peer.transport.get_write_buffer_size() > self.MAX_PEER_BUFFER:
+                        print("⚠️ Backplane peer too far behind, dropping it")
+                        self._peers.discard(peer)
+                        peer.close()
+                        continue
+                    peer.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            self._peers.discard(writer)
+            self._peer_tasks.discard(task)
+            writer.close()
+
+    async def _run(self):
+        """Worker side: stay connected to the broker, taking over if it goes away."""
+        while True:
+            try:
+                await self._become_broker()
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=self.MAX_LINE)
+            except OSError as e:
+                print(f"⚠️ Backplane broker unavailable: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            self._writer = writer
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    try:
+                        envelope = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    await self._receive(envelope)
+            except ConnectionError:
+                pass
+            finally:
+                self._writer = None
+                writer.close()
+            print("⚠️ Backplane connection lost, reconnecting")
+            await asyncio.sleep(0.5)
+
+    async def _send(self, envelope: dict):
+        if self._writer is None:
+            raise ConnectionError("not connected to broker")
+        self._writer.write((json.dumps(envelope, default=str) + "\n").encode())
+        await self._writer.drain()
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "connected": self._writer is not None,
+            "broker": self.is_broker,
+            "peers": len(self._peers)
+        }
+
+
+class MongoBackplane(Backplane):
+    """Events inserted into `live_events` and picked up by every worker's change stream."""
+
+    name = "mongo"
+
+    def __init__(self):
+        super().__init__()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if db.db is None:
+            print("⚠️ MongoDB backplane needs a database; events stay in this worker")
+            return
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _watch(self):
+        while True:
+            try:
+                pipeline = [{"$match": {"operationType": "insert"}}]
+                async with db.db.live_events.watch(pipeline) as stream:
+                    async for change in stream:
+                        await self._receive(change["fullDocument"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Backplane change stream error: {e}")
+                await asyncio.sleep(2.0)
+
+    async def _send(self, envelope: dict):
+        if db.db is None:
+            return
+        # Expired by the TTL index on created_at; the change stream is the delivery path
+        await db.db.live_events.insert_one({**envelope, "created_at": datetime.utcnow()})
+
+
+BACKPLANES: Dict[str, Type[Backplane]] = {
+    Backplane.name: Backplane,
+    UnixSocketBackplane.name: UnixSocketBackplane,
+    MongoBackplane.name: MongoBackplane,
+}
+
+
+def create_backplane(name: Optional[str] = None) -> Backplane:
+    name = (name or settings.BACKPLANE).lower()
+    if name == UnixSocketBackplane.name:
+        if not FCNTL_AVAILABLE:
+            print("⚠️  Unix-socket backplane needs fcntl (POSIX); using memory")
+            return Backplane()
+        return UnixSocketBackplane(settings.BACKPLANE_SOCKET)
+    backplane_cls = BACKPLANES.get(name)
+    if backplane_cls is None:
+        print(f"⚠️  Unknown BACKPLANE '{name}', falling back to memory")
+        backplane_cls = Backplane
+    return backplane_cls()
+
+
+backplane = create_backplane()
@@ -0,0 +1,66 @@
+"""
+Bounded audio-chunk queue that never blocks the producer.
+The WebSocket handler must not wait on a slow STT backend, so a full queue is
+resolved by policy instead of by blocking:
+- drop_oldest: discard the oldest queued chunk
+- coalesce:    merge the new chunk into the newest queued one (one STT call
+               instead of two), falling back to drop_oldest if they can't merge
+- slow_down:   ask the client to hold audio back once the queue is getting
+               full, and resume when it drains; drop_oldest if it still fills
+"""
+import asyncio
+from typing import Any, Callable, Optional
+
+BACKPRESSURE_POLICIES = ("drop_oldest", "coalesce", "slow_down")
+
+
+class ChunkQueue(asyncio.Queue):
+    """asyncio.Queue (unbounded underneath) with the capacity enforced by put_chunk()."""
+
+    def __init__(self, limit: int, policy: str):
+        super().__init__()
+        if policy not in BACKPRESSURE_POLICIES:
+            print(f"⚠️ Unknown backpressure policy '{policy}', using drop_oldest")
+            policy = "drop_oldest"
+        self.limit = max(1, limit)
+        self.policy = policy
+        self.queued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    def at_capacity(self) -> bool:
+        return self.qsize() >= self.limit
+
+    def drop_oldest(self) -> Any:
+        item = self._queue.popleft()
+        self.task_done()
+        self.dropped += 1
+        return item
+
+    def coalesce_last(self, merge: Callable[[Any], Optional[Any]]) -> Optional[Any]:
+        """Replace the newest item with merge(newest) and return it; None if it can't be merged."""
+        if not self._queue:
+            return None
+        merged = merge(self._queue[-1])
+        if merged is None:
+            return None
+        self._queue[-1] = merged
+        self.coalesced += 1
+        return merged
+
+    def put_chunk(self, item: Any):
+        self.put_nowait(item)
+        self.queued += 1
+        self.max_depth = max(self.max_depth, self.qsize())
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "depth": self.qsize(),
+            "limit": self.limit,
+            "max_depth": self.max_depth,
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced
+        }
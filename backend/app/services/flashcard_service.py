@@ -1,20 +1,27 @@
 from app.services.ai_service import AIService
 from app.database import db
+from app.services.search_index import search_index
 from app.models.flashcard import Flashcard, FlashcardSet
+from app.utils.chunking import split_transcript, allocate_counts, map_chunks, dedupe_by, normalize_text_key
 import uuid
 
 class FlashcardService:
     @staticmethod
-    async def generate_flashcards(session_id: str, transcript_text: str, num_cards: int = 15, card_types: list = None) -> FlashcardSet:
+    async def generate_flashcards(session_id: str, transcript_text: str, num_cards: int = 15, card_types: list = None, save: bool = True) -> FlashcardSet:
         flashcard_set_id = str(uuid.uuid4())
         
         types_text = ", ".join(card_types) if card_types else "definitions, concepts, formulas, facts"
         
-        prompt = f"""
+        # Long transcripts are split and the requested count shared out across the chunks
+        chunks = split_transcript(transcript_text)
+        work = [(c, n) for c, n in zip(chunks, allocate_counts(num_cards, chunks)) if n > 0]
+        
+        async def generate_part(chunk: str, idx: int) -> list:
+            prompt = f"""
         Generate a set of study flashcards from the following transcript.
         
         Parameters:
-        - Number of cards: {num_cards}
+        - Number of cards: {work[idx][1]}
         - Types to focus on: {types_text}
         
         Format Requirement:
@@ -27,12 +34,17 @@ class FlashcardService:
         - "tags": Array of keyword strings
         
         TRANSCRIPT:
-        {transcript_text[:15000]}
+        {chunk}
         """
+            ai_data = await AIService.generate_json(prompt)
+            return ai_data.get("cards", [])
         
         try:
-            ai_data = await AIService.generate_json(prompt)
-            cards_data = ai_data.get("cards", [])
+            parts = await map_chunks([c for c, _ in work], generate_part)
+            cards_data = dedupe_by(
+                (c for part in parts for c in part),
+                key=lambda c: normalize_text_key(c.get("front", ""))
+            )[:num_cards]
             
             parsed_cards = []
             for idx, c in enumerate(cards_data):
@@ -53,8 +65,9 @@ class FlashcardService:
                 cards=parsed_cards
             )
             
-            if db.db is not None:
+            if save and db.db is not None:
                 await db.db.flashcard_sets.insert_one(flashcard_set.dict())
+                await search_index.index_artifact("flashcards", flashcard_set.dict())
                 
             return flashcard_set
         except Exception as e:
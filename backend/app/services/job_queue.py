@@ -0,0 +1,236 @@
+"""
+In-process background job queue for slow AI generation.
+Endpoints enqueue a job and return its id immediately; a fixed pool of asyncio
+workers runs the registered handler. Job records are optionally mirrored to the
+`jobs` collection so queued/running jobs are picked up again after a restart.
+With several server workers sharing that collection, each persisted job is
+owned by the worker that claimed it, under a lease it keeps renewing; only jobs
+whose lease has lapsed (their worker exited) are taken over by another.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pymongo import ReturnDocument
+from app.config import settings
+from app.database import db
+from app.services.backplane import backplane, PROCESS_ID
+
+JobHandler = Callable[[dict], Awaitable[Any]]
+
+
+class JobQueue:
+    def __init__(self, workers: int, persist: bool, result_ttl_seconds: int, lease_seconds: int):
+        self.num_workers = workers
+        self.persist = persist
+        self.result_ttl = timedelta(seconds=result_ttl_seconds)
+        self.lease = timedelta(seconds=lease_seconds)
+        # Owner id written on the persisted jobs this worker has claimed
+        self.owner = PROCESS_ID
+        self.handlers: Dict[str, JobHandler] = {}
+        self.jobs: Dict[str, dict] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._lease_task: Optional[asyncio.Task] = None
+        self.taken_over = 0
+
+    def register(self, kind: str, handler: JobHandler):
+        """Handlers take the job's params dict and return something JSON-encodable."""
+        self.handlers[kind] = handler
+
+    @property
+    def _persisting(self) -> bool:
+        return self.persist and db.db is not None
+
+    def _lease_deadline(self) -> datetime:
+        return datetime.utcnow() + self.lease
+
+    async def _save(self, job: dict) -> bool:
+        """Update the persisted record; False if another worker has taken the job over."""
+        if not self._persisting:
+            return True
+        try:
+            result = await db.db.jobs.update_one({"job_id": job["job_id"], "owner": self.owner}, {"$set": job})
+            return result.matched_count > 0
+        except Exception as e:
+            print(f"⚠️ Failed to persist job {job['job_id']}: {e}")
+            return True
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+
+        # Restart survival: re-run anything whose worker is gone
+        if self._persisting:
+            await self._take_over_lapsed()
+            self._lease_task = asyncio.create_task(self._lease_loop())
+
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.num_workers)]
+        print(f"✅ Job queue started ({self.num_workers} workers)")
+
+    async def stop(self):
+        tasks = self._workers + ([self._lease_task] if self._lease_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._lease_task = None
+        if self._persisting:
+            # Let another worker pick up what we didn't finish without waiting out the lease
+            try:
+                await db.db.jobs.update_many(
+                    {"owner": self.owner, "status": {"$in": ["queued", "running"]}},
+                    {"$set": {"lease_until": datetime.utcnow()}}
+                )
+            except Exception as e:
+                print(f"⚠️ Failed to release jobs: {e}")
+
+    async def _take_over_lapsed(self) -> int:
+        """Claim unfinished jobs whose owner stopped renewing its lease, one atomic update each."""
+        claimed = 0
+        while True:
+            job = await db.db.jobs.find_one_and_update(
+                {
+                    "status": {"$in": ["queued", "running"]},
+                    "$or": [{"lease_until": {"$lt": datetime.utcnow()}}, {"lease_until": {"$exists": False}}]
+                },
+                {"$set": {"owner": self.owner, "status": "queued", "lease_until": self._lease_deadline()}},
+                projection={"_id": 0, "lease_until": 0},
+                sort=[("created_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                break
+            self.jobs[job["job_id"]] = job
+            self._queue.put_nowait(job["job_id"])
+            claimed += 1
+        if claimed:
+            self.taken_over += claimed
+            print(f"🔄 Re-queued {claimed} unfinished job(s)")
+        return claimed
+
+    async def _lease_loop(self):
+        """Renew the lease on this worker's unfinished jobs and take over lapsed ones."""
+        interval = self.lease.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await db.db.jobs.update_many(
+                    {"owner": self.owner, "status": {"$in": ["queued", "running"]}},
+                    {"$set": {"lease_until": self._lease_deadline()}}
+                )
+                await self._take_over_lapsed()
+            except Exception as e:
+                print(f"⚠️ Job lease renewal failed: {e}")
+
+    async def submit(self, kind: str, params: dict, session_id: Optional[str] = None) -> dict:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job queue not started")
+
+        self._prune()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "kind": kind,
+            "session_id": session_id,
+            "params": params,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+            "owner": self.owner
+        }
+        self.jobs[job["job_id"]] = job
+        if self._persisting:
+            try:
+                await db.db.jobs.insert_one({**job, "lease_until": self._lease_deadline()})
+            except Exception as e:
+                print(f"⚠️ Failed to persist job {job['job_id']}: {e}")
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        if job is None and self._persisting:
+            job = await db.db.jobs.find_one({"job_id": job_id}, {"_id": 0})
+        return job
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+
+            job["status"] = "running"
+            job["started_at"] = datetime.utcnow()
+            if not await self._save(job):
+                # Our lease lapsed while it waited and another worker has it now
+                del self.jobs[job_id]
+                continue
+
+            try:
+                result = await self.handlers[job["kind"]](job["params"])
+                job["result"] = jsonable_encoder(result)
+                job["status"] = "completed"
+            except asyncio.CancelledError:
+                # Shutting down: leave it "running"; once its lease lapses another worker
+                # (or this one after a restart) re-runs it
+                raise
+            except HTTPException as e:
+                job["error"] = e.detail
+                job["status"] = "failed"
+            except Exception as e:
+                print(f"❌ Job {job_id} ({job['kind']}) failed: {e}")
+                job["error"] = str(e)
+                job["status"] = "failed"
+
+            job["finished_at"] = datetime.utcnow()
+            await self._save(job)
+            await backplane.publish(None, {
+                "type": "job",
+                "job_id": job_id,
+                "kind": job["kind"],
+                "session_id": job["session_id"],
+                "status": job["status"]
+            })
+
+    def _prune(self):
+        """Forget finished jobs from memory once their result TTL has passed."""
+        cutoff = datetime.utcnow() - self.result_ttl
+        stale = [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in stale:
+            del self.jobs[job_id]
+
+    def stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "taken_over": self.taken_over,
+            "jobs": counts
+        }
+
+
+def job_response(job: dict) -> dict:
+    """Public view of a job record (params omitted — they may hold a whole transcript)."""
+    return jsonable_encoder({k: v for k, v in job.items() if k != "params"})
+
+
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    persist=settings.JOB_PERSIST,
+    result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS,
+    lease_seconds=settings.JOB_LEASE_SECONDS
+)
@@ -1,10 +1,54 @@
+"""
+Real-time Q&A Chatbot using Google Gemini API
+Analyzes transcript and answers questions based on context
+Think Mode: Uses Tavily web search for additional context
+"""
 import asyncio
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
+from app.config import settings
+from app.services.ai_service import AIService, get_model
+from app.services.transcript_index import TranscriptIndex
+
+# Try to import Tavily
+try:
+    from tavily import TavilyClient
+    TAVILY_AVAILABLE = True
+except ImportError:
+    TAVILY_AVAILABLE = False
+    print("⚠️  Tavily not installed. Think Mode will use Gemini's knowledge only.")
 
-# ... (imports)
 
 class QAChatbot:
-    # ... (init remains same)
+    """Q&A Chatbot that answers questions based on transcript context using Gemini"""
+    
+    def __init__(self, model_name: str = "gemini-2.5-flash"):
+        self.model_name = model_name
+        self.conversation_history: List[Dict[str, str]] = []
+        self.tavily_client = None
+        
+        # Gemini is configured once in ai_service; reuse its model registry
+        if not settings.GEMINI_API_KEY:
+            print("⚠️  GEMINI_API_KEY not found in environment variables")
+            self.available = False
+        else:
+            try:
+                self.model = get_model(self.model_name)
+                self.available = True
+                print(f"✅ Gemini chatbot ready with model: {self.model_name}")
+            except Exception as e:
+                print(f"❌ Failed to configure Gemini: {e}")
+                self.available = False
+        
+        # Configure Tavily for Think Mode
+        if TAVILY_AVAILABLE and settings.TAVILY_API_KEY:
+            try:
+                self.tavily_client = TavilyClient(api_key=settings.TAVILY_API_KEY)
+                print("✅ Tavily web search ready for Think Mode")
+            except Exception as e:
+                print(f"⚠️  Failed to configure Tavily: {e}")
+                self.tavily_client = None
+        elif not settings.TAVILY_API_KEY:
+            print("⚠️  TAVILY_API_KEY not found. Think Mode will use Gemini's knowledge only.")
 
     async def _search_web(self, query: str, max_results: int = 3) -> tuple[str, list]:
         """Search the web using Tavily and return summarized results and source metadata"""
@@ -44,7 +88,7 @@ class QAChatbot:
             print(f"❌ Web search error: {e}")
             return "", []
     
-    async def ask(self, question: str, transcript: str, think_mode: bool = False) -> dict:
+    async def ask(self, question: str, transcript: str, think_mode: bool = False, index: Optional[TranscriptIndex] = None) -> dict:
         """
         Ask a question about the transcript
         
@@ -52,6 +96,7 @@ class QAChatbot:
             question: User's question
             transcript: Current transcript text
             think_mode: If True, search web for additional context. If False, only use transcript.
+            index: Optional chunk index of the transcript; long transcripts are reduced to the top-k relevant windows.
             
         Returns:
             Dict containing 'answer' and optional 'sources'
@@ -70,12 +115,12 @@ class QAChatbot:
             web_context, sources = await self._search_web(question)
         
         # Create context-aware prompt
-        prompt = self._create_prompt(question, transcript, think_mode, web_context)
+        context = self._select_context(question, transcript, index)
+        prompt = self._create_prompt(question, context, think_mode, web_context)
         
         try:
-            # Generate response asynchronously
-            response = await self.model.generate_content_async(prompt)
-            answer = response.text.strip()
+            # Through AIService so the governor's limits apply; answers depend on history, so no cache
+            answer = (await AIService.generate_content(prompt, self.model_name, use_cache=False)).strip()
             
             # Store in conversation history
             self.conversation_history.append({
@@ -93,6 +138,59 @@ class QAChatbot:
             print(f"❌ Q&A error: {e}")
             return {"answer": f"Error generating answer: {str(e)}", "sources": []}
     
+    async def ask_stream(self, question: str, transcript: str, think_mode: bool = False, index: Optional[TranscriptIndex] = None) -> AsyncIterator[dict]:
+        """
+        Streaming variant of ask().
+        
+        Yields event dicts: one "sources" event, then "token" events as text arrives,
+        then a final "done" event carrying the full answer (or an "error" event).
+        """
+        if not self.available:
+            yield {"type": "error", "message": "Gemini API is not available. Please check your GEMINI_API_KEY in .env file."}
+            return
+        
+        if not transcript or len(transcript.strip()) < 10:
+            yield {"type": "error", "message": "I don't have enough transcript context yet. Please wait for more transcription or start speaking."}
+            return
+        
+        web_context = ""
+        sources = []
+        if think_mode:
+            web_context, sources = await self._search_web(question)
+        yield {"type": "sources", "sources": sources}
+        
+        context = self._select_context(question, transcript, index)
+        prompt = self._create_prompt(question, context, think_mode, web_context)
+        
+        parts = []
+        try:
+            async for text in AIService.stream_content(prompt, self.model_name, use_cache=False):
+                parts.append(text)
+                yield {"type": "token", "text": text}
+        except Exception as e:
+            print(f"❌ Q&A stream error: {e}")
+            yield {"type": "error", "message": f"Error generating answer: {str(e)}"}
+            return
+        
+        answer = "".join(parts).strip()
+        self.conversation_history.append({
+            "question": question,
+            "answer": answer
+        })
+        print(f"✅ Q&A (stream): {question[:50]}... → {answer[:50]}...")
+        yield {"type": "done", "answer": answer, "sources": sources}
+    
+    def _select_context(self, question: str, transcript: str, index: Optional[TranscriptIndex]) -> str:
+        """Keep prompt size bounded: retrieve relevant windows once the transcript is long"""
+        if index is None:
+            return transcript
+        return index.context_for(
+            question,
+            transcript,
+            top_k=settings.QA_RETRIEVAL_TOP_K,
+            min_chars=settings.QA_RETRIEVAL_MIN_CHARS
+        )
+    
     def _create_prompt(self, question: str, transcript: str, think_mode: bool = False, web_context: str = "") -> str:
         """Create a context-aware prompt for the AI"""
         
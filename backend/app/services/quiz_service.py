@@ -1,22 +1,29 @@
 from app.services.ai_service import AIService
 from app.database import db
+from app.services.search_index import search_index
 from app.models.quiz import Quiz, QuizQuestion, QuestionOption, QuizSubmissionResult
+from app.utils.chunking import split_transcript, allocate_counts, map_chunks, dedupe_by, normalize_text_key
 import uuid
 from datetime import datetime
 
 class QuizService:
     @staticmethod
-    async def generate_quiz(session_id: str, transcript_text: str, num_questions: int = 10, difficulty: str = "medium", topic: str = None) -> Quiz:
+    async def generate_quiz(session_id: str, transcript_text: str, num_questions: int = 10, difficulty: str = "medium", topic: str = None, save: bool = True) -> Quiz:
         """
         Generate a quiz from transcript using AI
         """
         quiz_id = str(uuid.uuid4())
         
-        prompt = f"""
+        # Long transcripts are split and questions shared out across the chunks
+        chunks = split_transcript(transcript_text)
+        work = [(c, n) for c, n in zip(chunks, allocate_counts(num_questions, chunks)) if n > 0]
+        
+        async def generate_part(chunk: str, idx: int) -> list:
+            prompt = f"""
         Generate a multiple-choice quiz based on the following transcript.
         
         Parameters:
-        - Number of questions: {num_questions}
+        - Number of questions: {work[idx][1]}
         - Difficulty: {difficulty}
         - Topic focus: {topic if topic else "General understanding of the lecture"}
         
@@ -30,12 +37,17 @@ class QuizService:
         - "topic": Sub-topic of the question
         
         TRANSCRIPT:
-        {transcript_text[:15000]}  # Limit context window if needed
+        {chunk}
         """
+            ai_data = await AIService.generate_json(prompt)
+            return ai_data.get("questions", [])
         
         try:
-            ai_data = await AIService.generate_json(prompt)
-            questions_data = ai_data.get("questions", [])
+            parts = await map_chunks([c for c, _ in work], generate_part)
+            questions_data = dedupe_by(
+                (q for part in parts for q in part),
+                key=lambda q: normalize_text_key(q.get("question_text", ""))
+            )[:num_questions]
             
             # Parse into Pydantic models
             parsed_questions = []
@@ -61,9 +73,10 @@ class QuizService:
                 metadata={"generated_by": "gemini"}
             )
             
-            # Save to DB
-            if db.db is not None:
+            # Save to DB (save=False lets callers batch the write, e.g. the study pack)
+            if save and db.db is not None:
                 await db.db.quizzes.insert_one(quiz.dict())
+                await search_index.index_artifact("quiz", quiz.dict())
             
             return quiz
         except Exception as e:
@@ -0,0 +1,157 @@
+"""
+Live rolling summary maintained while a lecture is being recorded.
+New transcript segments are batched (by size or after a debounce delay) and
+folded into the previous summary with a small delta prompt, then pushed to
+WebSocket clients. At save time only the last unsummarized tail remains.
+"""
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+from app.services.ai_service import AIService
+from app.state import manager
+
+
+class RollingSummarizer:
+    # While updates keep failing (AI down, no key) retries back off up to this delay,
+    # and only the newest MAX_PENDING_CHARS of transcript wait to be folded in
+    MAX_RETRY_SECONDS = 300.0
+    MAX_PENDING_CHARS = 12000
+
+    def __init__(
+        self,
+        min_chars: int,
+        debounce_seconds: float,
+        broadcast: Optional[Callable[[dict], Awaitable[None]]] = None
+    ):
+        self.min_chars = min_chars
+        self.debounce_seconds = debounce_seconds
+        # Where updates are pushed; the owning live session passes its own clients
+        self.broadcast = broadcast or manager.broadcast
+        self.summary = ""
+        self.updates = 0
+        self.failures = 0  # consecutive failed updates
+
+        # Everything runs on the event loop (the transcriber calls feed() from there too)
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._retry_at = 0.0  # loop time before which no update starts after a failure
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def reset(self):
+        self._pending = []
+        self._pending_chars = 0
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self.summary = ""
+        self.failures = 0
+        self._retry_at = 0.0
+
+    def feed(self, text: str):
+        """Queue a new transcript segment."""
+        self._pending.append(text)
+        self._pending_chars += len(text) + 1
+        self._trim_pending()
+        if self._loop is not None:
+            self._schedule()
+
+    def _trim_pending(self):
+        """Drop the oldest pending text beyond MAX_PENDING_CHARS (only piles up while updates fail)."""
+        while self._pending_chars > self.MAX_PENDING_CHARS and len(self._pending) > 1:
+            self._pending_chars -= len(self._pending.pop(0)) + 1
+        if self._pending_chars > self.MAX_PENDING_CHARS:
+            self._pending[0] = self._pending[0][-self.MAX_PENDING_CHARS:]
+            self._pending_chars = len(self._pending[0]) + 1
+
+    def _schedule(self):
+        if self._task is not None and not self._task.done():
+            return  # the running update re-checks the backlog when it finishes
+        backoff = self._retry_at - self._loop.time()
+        if backoff > 0:
+            if self._pending and self._timer is None:
+                self._timer = self._loop.call_later(backoff, self._on_timer)
+            return
+        if self._pending_chars >= self.min_chars:
+            self._start_update()
+        elif self._pending and self._timer is None:
+            self._timer = self._loop.call_later(self.debounce_seconds, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        if self._pending and (self._task is None or self._task.done()):
+            self._start_update()
+
+    def _start_update(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self._task = asyncio.ensure_future(self._update())
+
+    async def _update(self):
+        batch = " ".join(self._pending).strip()
+        self._pending = []
+        self._pending_chars = 0
+        if not batch:
+            return
+
+        prompt = f"""You maintain a running summary of a lecture that is still in progress.
+
+        Structure: a brief overview paragraph, then numbered MAIN TOPICS with a), b), c) sub-points,
+        then key takeaways. Fold the NEW TRANSCRIPT into the CURRENT SUMMARY: extend existing topics,
+        add new ones, and keep earlier content unless the lecturer corrected it.
+
+        CURRENT SUMMARY:
+        {self.summary or "(none yet)"}
+
+        NEW TRANSCRIPT:
+        {batch}
+
+        Return only the full updated summary as plain text."""
+
+        try:
+            self.summary = (await AIService.generate_content(prompt, use_cache=False)).strip()
+            self.updates += 1
+        except Exception as e:
+            # Put the batch back and retry, waiting twice as long after each failure in a row
+            self.failures += 1
+            delay = min(self.debounce_seconds * 2 ** (self.failures - 1), self.MAX_RETRY_SECONDS)
+            print(f"❌ Rolling summary update failed ({self.failures}x, retrying in {delay:.0f}s): {e}")
+            self._pending.insert(0, batch)
+            self._pending_chars += len(batch) + 1
+            self._trim_pending()
+            if self._loop is not None:
+                self._retry_at = self._loop.time() + delay
+                if self._timer is None:
+                    self._timer = self._loop.call_later(delay, self._on_timer)
+            return
+        self.failures = 0
+        self._retry_at = 0.0
+
+        await self.broadcast({"type": "rolling_summary", "summary": self.summary})
+        # Segments that arrived during the call may already warrant another update
+        if self._loop is not None:
+            self._loop.call_soon(self._schedule)
+
+    async def flush(self) -> str:
+        """Fold in whatever is still pending and return the up-to-date summary."""
+        for _ in range(3):
+            if self._task is not None and not self._task.done():
+                await asyncio.shield(self._task)
+            if not self._pending:
+                break
+            self._start_update()
+            await asyncio.shield(self._task)
+        return self.summary
+
+    async def take(self) -> str:
+        """flush(), then start over: the summary belongs to whoever saved it, not to the next lecture."""
+        summary = await self.flush()
+        self.reset()
+        return summary
+
@@ -0,0 +1,306 @@
+"""
+Full-text search over saved sessions and generated study material.
+An in-memory BM25 inverted index over transcripts, summaries, terminologies,
+quizzes, flashcards and question sets. It is built from MongoDB on the first
+search and then kept current by the write paths (save, analyze, generators),
+which call index_session / index_artifact. Other workers hear about those writes
+over the backplane and reload the changed documents.
+Document text is kept zlib-compressed and only inflated for result snippets.
+"""
+import asyncio
+import heapq
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.database import db
+from app.services import session_store
+from app.services.backplane import backplane
+from app.services.transcript_index import tokenize
+
+# Internal topic: no WebSocket client subscribes to it, only the remote handler listens
+SEARCH_TOPIC = "internal:search"
+
+SESSION_FIELDS = ("transcript", "summary", "terminologies")
+
+# Same tokens as tokenize(), with positions for highlighting
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _join(parts: Iterable[Optional[str]]) -> str:
+    return "\n".join(p for p in parts if p)
+
+
+def _terminologies_text(terms) -> str:
+    if isinstance(terms, dict):
+        return _join(f"{term}: {(info or {}).get('definition', '')}" for term, info in terms.items())
+    if isinstance(terms, list):
+        return _join(f"{t.get('term', '')}: {t.get('definition', '')}" for t in terms if isinstance(t, dict))
+    return ""
+
+
+# Generated artifacts: kind -> (collection, id field, text of the stored document)
+ARTIFACT_SOURCES: Dict[str, Tuple[str, str, Callable[[dict], str]]] = {
+    "quiz": ("quizzes", "quiz_id", lambda d: _join(
+        _join([q.get("question_text"), *(o.get("option_text") for o in q.get("options", [])), q.get("explanation")])
+        for q in d.get("questions", [])
+    )),
+    "flashcards": ("flashcard_sets", "flashcard_set_id", lambda d: _join(
+        f"{c.get('front', '')}\n{c.get('back', '')}" for c in d.get("cards", [])
+    )),
+    "one_word": ("one_word_question_sets", "question_set_id", lambda d: _join(
+        f"{q.get('question_text', '')} {q.get('correct_answer', '')}" for q in d.get("questions", [])
+    )),
+    "short_answer": ("short_answer_question_sets", "question_set_id", lambda d: _join(
+        f"{q.get('question_text', '')}\n{q.get('sample_answer', '')}" for q in d.get("questions", [])
+    )),
+    "summary_report": ("summaries", "summary_id", lambda d: _join(
+        [d.get("main_summary"), *d.get("key_points", []), *d.get("main_topics", [])]
+    )),
+}
+
+
+class SearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75, snippet_chars: int = 200):
+        self.k1 = k1
+        self.b = b
+        self.snippet_chars = snippet_chars
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        self._loading = False
+        self._pending: List[Tuple[str, tuple]] = []
+        self._clear()
+
+    def _clear(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.total_len = 0
+        self.meta: Dict[str, dict] = {}
+        self.texts: Dict[str, bytes] = {}
+        self.doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self.session_names: Dict[str, str] = {}
+
+    # ---- index maintenance (synchronous, in-memory) ----
+
+    def _remove(self, key: str):
+        for term in self.doc_terms.pop(key, ()):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(key, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(key, 0)
+        self.meta.pop(key, None)
+        self.texts.pop(key, None)
+
+    def _put(self, key: str, text: str, meta: dict):
+        self._remove(key)
+        tf = Counter(tokenize(text))
+        if not tf:
+            return
+        for term, count in tf.items():
+            self.postings.setdefault(term, {})[key] = count
+        length = sum(tf.values())
+        self.doc_len[key] = length
+        self.total_len += length
+        self.doc_terms[key] = tuple(tf)
+        self.meta[key] = meta
+        self.texts[key] = zlib.compress(text.encode("utf-8"))
+
+    def _apply_session(self, session: dict):
+        """Index whichever of a session's searchable fields are present in `session`."""
+        session_id = session.get("id")
+        if not session_id:
+            return
+        if session.get("name"):
+            self.session_names[session_id] = session["name"]
+        for field in SESSION_FIELDS:
+            if field not in session:
+                continue
+            value = session[field]
+            text = _terminologies_text(value) if field == "terminologies" else (value or "")
+            self._put(f"{field}:{session_id}", text, {
+                "kind": field,
+                "session_id": session_id,
+                "ref_id": session_id,
+                "timestamp": session.get("timestamp")
+            })
+
+    def _apply_artifact(self, kind: str, doc: dict):
+        collection, id_field, to_text = ARTIFACT_SOURCES[kind]
+        ref_id = doc.get(id_field)
+        if not ref_id:
+            return
+        self._put(f"{kind}:{ref_id}", to_text(doc), {
+            "kind": kind,
+            "session_id": doc.get("session_id"),
+            "ref_id": ref_id,
+            "timestamp": doc.get("created_at")
+        })
+
+    def _apply_remove_session(self, session_id: str):
+        for key in [k for k, m in self.meta.items() if m["session_id"] == session_id]:
+            self._remove(key)
+        self.session_names.pop(session_id, None)
+
+    def _apply(self, op: str, args: tuple):
+        if not self.loaded:
+            if self._loading:
+                self._pending.append((op, args))  # re-applied over the fresh snapshot
+            return  # not built yet; the initial load will read it from the database
+        getattr(self, op)(*args)
+
+    # ---- loading ----
+
+    async def ensure_loaded(self):
+        """Build the index from MongoDB once (later writes keep it current)."""
+        if self.loaded or db.db is None:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            self._loading = True
+            try:
+                await self._build()
+            finally:
+                self._loading = False
+
+    async def _build(self):
+        self._clear()
+        projection = {"_id": 0, "id": 1, "name": 1, "timestamp": 1, **{f: 1 for f in SESSION_FIELDS}}
+        timestamps = {}
+        async for session in db.db.sessions.find({}, projection):
+            self._apply_session(session)
+            timestamps[session.get("id")] = session.get("timestamp")
+        # Transcripts of split sessions live in their own collection
+        async for session_id, transcript in session_store.iter_transcripts():
+            if session_id in timestamps:
+                self._apply_session({"id": session_id, "timestamp": timestamps[session_id], "transcript": transcript})
+        for kind, (collection, _, _) in ARTIFACT_SOURCES.items():
+            async for doc in db.db[collection].find({}, {"_id": 0}):
+                self._apply_artifact(kind, doc)
+        self.loaded = True
+        for op, args in self._pending:
+            getattr(self, op)(*args)
+        self._pending = []
+        print(f"🔎 Search index built: {len(self.meta)} documents, {len(self.postings)} terms")
+
+    # ---- write hooks (called where sessions/artifacts are saved) ----
+
+    async def index_session(self, session: dict):
+        """A session was saved or some of its fields updated (pass the fields that changed)."""
+        self._apply("_apply_session", (session,))
+        await self._announce({"op": "session", "session_id": session.get("id")})
+
+    async def index_artifact(self, kind: str, doc: dict):
+        self._apply("_apply_artifact", (kind, doc))
+        await self._announce({"op": "artifact", "kind": kind, "ref_id": doc.get(ARTIFACT_SOURCES[kind][1])})
+
+    async def remove_session(self, session_id: str):
+        self._apply("_apply_remove_session", (session_id,))
+        await self._announce({"op": "remove", "session_id": session_id})
+
+    async def _announce(self, message: dict):
+        try:
+            await backplane.publish(SEARCH_TOPIC, {"type": "search_index", **message})
+        except Exception as e:
+            print(f"⚠️ Search index update not announced: {e}")
+
+    def apply_remote(self, topic: Optional[str], message: dict):
+        """Backplane hook: another worker wrote something; reload it from the database."""
+        if topic == SEARCH_TOPIC and self.loaded:
+            asyncio.ensure_future(self._reload(message))
+
+    async def _reload(self, message: dict):
+        if db.db is None:
+            return
+        op = message.get("op")
+        if op == "remove":
+            self._apply("_apply_remove_session", (message["session_id"],))
+        elif op == "session":
+            projection = {"_id": 0, "id": 1, "name": 1, "timestamp": 1, **{f: 1 for f in SESSION_FIELDS}}
+            session = await db.db.sessions.find_one({"id": message["session_id"]}, projection)
+            if session:
+                if "transcript" not in session:
+                    session["transcript"] = await session_store.get_transcript(session["id"]) or ""
+                self._apply("_apply_session", (session,))
+        elif op == "artifact" and message.get("kind") in ARTIFACT_SOURCES:
+            collection, id_field, _ = ARTIFACT_SOURCES[message["kind"]]
+            doc = await db.db[collection].find_one({id_field: message["ref_id"]}, {"_id": 0})
+            if doc:
+                self._apply("_apply_artifact", (message["kind"], doc))
+
+    # ---- querying ----
+
+    def search(self, query: str, limit: int = 10, kinds: Optional[Set[str]] = None,
+               session_id: Optional[str] = None) -> List[dict]:
+        """BM25-ranked matches, each with a snippet and highlight offsets within it."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        n_docs = len(self.doc_len)
+        if not terms or not n_docs:
+            return []
+        avg_len = self.total_len / n_docs
+
+        scores: Dict[str, float] = {}
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for key, tf in docs.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[key] / avg_len)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        if kinds or session_id:
+            scores = {
+                k: s for k, s in scores.items()
+                if (not kinds or self.meta[k]["kind"] in kinds)
+                and (not session_id or self.meta[k]["session_id"] == session_id)
+            }
+
+        results = []
+        for key, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            meta = self.meta[key]
+            snippet, highlights = self._snippet(zlib.decompress(self.texts[key]).decode("utf-8"), set(terms))
+            results.append({
+                **meta,
+                "title": self.session_names.get(meta["session_id"], "Untitled Session"),
+                "score": round(score, 4),
+                "snippet": snippet,
+                "highlights": highlights
+            })
+        return results
+
+    def _snippet(self, text: str, terms: Set[str]) -> Tuple[str, List[List[int]]]:
+        """The window of snippet_chars covering the most distinct query terms."""
+        hits = [(m.start(), m.end(), m.group().lower()) for m in _TOKEN_RE.finditer(text)
+                if m.group().lower() in terms]
+        if not hits:
+            return text[:self.snippet_chars], []
+
+        best_start, best_count = hits[0][0], 0
+        right = 0
+        for left in range(len(hits)):
+            window_end = hits[left][0] + self.snippet_chars
+            while right < len(hits) and hits[right][1] <= window_end:
+                right += 1
+            count = len({h[2] for h in hits[left:right]})
+            if count > best_count:
+                best_start, best_count = hits[left][0], count
+
+        # Lead in with a little context, starting at a word boundary
+        start = max(0, best_start - self.snippet_chars // 4)
+        if start > 0:
+            space = text.find(" ", start, best_start)
+            start = space + 1 if space != -1 else best_start
+        end = min(len(text), start + self.snippet_chars)
+        highlights = [[s - start, e - start] for s, e, _ in hits if s >= start and e <= end]
+        return text[start:end], highlights
+
+    def stats(self) -> dict:
+        return {"loaded": self.loaded, "documents": len(self.meta), "terms": len(self.postings)}
+
+
+search_index = SearchIndex()
+backplane.remote_handlers.append(search_index.apply_remote)
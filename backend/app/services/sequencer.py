@@ -0,0 +1,115 @@
+"""
+Put parallel transcription results back into chunk order.
+Chunks get increasing sequence numbers when they are queued; results are held
+until every earlier chunk has finished, so the transcript reads in spoken order
+even when one upload is slow. A chunk that takes longer than `timeout` is
+skipped over (its text is released late when it arrives).
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class ReorderBuffer:
+    def __init__(self, release: Callable[[int, Optional[str]], None], timeout: float = 10.0):
+        self.release = release
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._next_seq = 1        # next sequence number to hand out
+            self._next_release = 1    # next sequence number to release
+            self._queued_at: Dict[int, float] = {}
+            self._done: Dict[int, Optional[str]] = {}
+            self._skipped = set()
+            self.released = 0
+            self.reordered = 0
+            self.timed_out = 0
+            self.late = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+            self.last_latency = 0.0
+
+    def next_seq(self) -> int:
+        """Number a chunk as it is queued for transcription."""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._queued_at[seq] = time.monotonic()
+            return seq
+
+    def complete(self, seq: int, result: Optional[str]):
+        """Record a finished chunk (result None if it failed or was empty) and release what is ready."""
+        with self._lock:
+            queued_at = self._queued_at.pop(seq, None)
+            if queued_at is None:
+                return  # from before a reset
+            latency = time.monotonic() - queued_at
+            self.last_latency = latency
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+            if seq in self._skipped:
+                self._skipped.discard(seq)
+                self.late += 1
+                self._emit(seq, result)
+                return
+            if seq != self._next_release:
+                self.reordered += 1
+            self._done[seq] = result
+            self._drain()
+
+    def poll(self):
+        """Skip over chunks that have been outstanding longer than the timeout."""
+        with self._lock:
+            self._drain()
+
+    def flush(self):
+        """Release everything finished, giving up on chunks that never will (e.g. cancelled on stop)."""
+        with self._lock:
+            while self._next_release < self._next_seq:
+                seq = self._next_release
+                if seq in self._done:
+                    self._emit(seq, self._done.pop(seq))
+                self._queued_at.pop(seq, None)
+                self._next_release += 1
+            for seq in self._skipped:
+                self._queued_at.pop(seq, None)
+            self._skipped.clear()
+
+    def _drain(self):
+        while True:
+            seq = self._next_release
+            if seq in self._done:
+                self._emit(seq, self._done.pop(seq))
+            elif seq in self._queued_at and self._done and \
+                    time.monotonic() - self._queued_at[seq] > self.timeout:
+                # Later chunks are waiting on a slow one; stop holding them back
+                self._skipped.add(seq)
+                self.timed_out += 1
+                print(f"⏱️ [{seq}] Still transcribing after {self.timeout:.0f}s, releasing later chunks")
+            else:
+                return
+            self._next_release += 1
+
+    def _emit(self, seq: int, result: Optional[str]):
+        self.released += 1
+        if result:
+            self.release(seq, result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.released
+            return {
+                "in_flight": len(self._queued_at),
+                "held": len(self._done),
+                "released": finished,
+                "reordered": self.reordered,
+                "timed_out": self.timed_out,
+                "late": self.late,
+                "avg_latency_ms": round(self.latency_total / finished * 1000) if finished else 0,
+                "max_latency_ms": round(self.latency_max * 1000),
+                "last_latency_ms": round(self.last_latency * 1000)
+            }
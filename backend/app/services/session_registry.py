@@ -0,0 +1,363 @@
+"""
+Registry of live recording sessions.
+Each session owns its transcriber pipeline (audio queue, STT worker tasks),
+transcript buffer, dedupe state, retrieval index and rolling summary, so several
+lectures can record in one server process. The cap on STT calls is shared.
+With several server workers, session events travel over the backplane and every
+worker mirrors them into its own copy of the session.
+Transcript segments are also written to `live_segments` as they are produced.
+A worker that creates its copy of a session mid-lecture (it joined late or
+restarted) loads the segments so far before answering transcript reads or Q&A.
+What a late copy still can't recover: segments whose write failed or that passed
+LIVE_SEGMENTS_TTL_SECONDS, the poll backlog (/api/transcription/poll), and the
+rolling summary until its next update. Recording state, queued audio and dedupe
+state stay with the worker receiving the audio.
+Clients that don't name a session all land in DEFAULT_SESSION_ID.
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set
+from fastapi import WebSocket
+from app.config import settings
+from app.database import db
+from app.services.audio_transcriber import AudioTranscriber
+from app.services.backplane import backplane
+from app.services.rolling_summary import RollingSummarizer
+from app.services.transcript_buffer import TranscriptBuffer
+from app.services.transcript_index import TranscriptIndex
+from app.state import manager
+
+DEFAULT_SESSION_ID = "default"
+
+
+def session_topic(session_id: Optional[str]) -> str:
+    """WebSocket topic carrying one live session's transcript/status messages."""
+    return f"session:{session_id or DEFAULT_SESSION_ID}"
+
+
+class LiveSession:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # Timestamped segments; .text is the joined transcript
+        self.transcript = TranscriptBuffer()
+        self.is_recording = False
+        self.messages: List[dict] = []
+        self.last_active = time.monotonic()
+        # Set when a lecture recorded here is saved; the next start() begins a new rolling summary
+        self.saved = False
+
+        # Retrieval index over the transcript, fed alongside it
+        self.transcript_index = TranscriptIndex()
+        # Whether segments persisted before this copy existed have been loaded
+        self.transcript_complete = False
+        self._load_task: Optional[asyncio.Task] = None
+        # Fallback queue for clients polling /api/transcription/poll (results are also pushed over /ws)
+        self.transcription_queue: Deque[str] = deque(maxlen=500)
+
+        # Clients subscribed to this topic get this session's messages
+        self.topic = session_topic(session_id)
+        self.transcriber = AudioTranscriber(capture_local=session_id == DEFAULT_SESSION_ID)
+        # Backpressure is for the sockets sending this worker audio, not every listener
+        self.producers: Set[WebSocket] = set()
+        self.transcriber.on_control = self._send_control
+        self.rolling_summarizer = RollingSummarizer(
+            min_chars=settings.ROLLING_SUMMARY_MIN_CHARS,
+            debounce_seconds=settings.ROLLING_SUMMARY_DEBOUNCE_SECONDS,
+            broadcast=self.broadcast
+        )
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    @property
+    def connections(self) -> Set[WebSocket]:
+        return manager.subscribers(self.topic)
+
+    def add_producer(self, websocket: WebSocket):
+        """A socket sent audio into this session; it gets the transcriber's control messages."""
+        if websocket in self.producers:
+            return
+        self.producers.add(websocket)
+        if self.transcriber.slowed_down:
+            # Joined while the queue is backed up: hold back like the others
+            asyncio.ensure_future(manager.broadcast(
+                {"type": "backpressure", "action": "slow_down", "session_id": self.session_id},
+                connections=[websocket]
+            ))
+
+    def _send_control(self, message: dict):
+        if self.producers:
+            asyncio.ensure_future(manager.broadcast(
+                {**message, "session_id": self.session_id}, connections=list(self.producers)
+            ))
+
+    async def broadcast(self, message: dict):
+        """Send to the clients subscribed to this session only (on every worker)."""
+        await backplane.publish(self.topic, {**message, "session_id": self.session_id})
+
+    def apply_remote(self, message: dict):
+        """
+        Mirror an event another worker published for this session, so Q&A,
+        polling and saving work here too, and audio that reaches this worker
+        is transcribed while the session is recording.
+        """
+        kind = message.get("type")
+        if kind == "transcript":
+            segment = message.get("segment") or {}
+            text = message.get("text", "")
+            self.transcript.append(
+                text,
+                start=segment.get("start"),
+                end=segment.get("end"),
+                chunk_id=segment.get("chunk_id"),
+                speaker=segment.get("speaker"),
+                lang=segment.get("lang")
+            )
+            self.transcript_index.add(text)
+            self.transcription_queue.append(text)
+            self.touch()
+        elif kind == "rolling_summary":
+            self.rolling_summarizer.summary = message.get("summary", "")
+        elif kind == "status" and message.get("status") == "recording" and not self.is_recording:
+            asyncio.ensure_future(self.start(local_audio=False))
+        elif kind == "status" and message.get("status") == "idle" and self.is_recording:
+            asyncio.ensure_future(self.stop())
+        elif kind == "cleared":
+            asyncio.ensure_future(self._clear_remote())
+
+    async def _clear_remote(self):
+        await self.stop()
+        self.clear()
+
+    async def load_transcript(self):
+        """Load the segments persisted before this copy existed (once; later calls wait for it)."""
+        if self.transcript_complete:
+            return
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(self._load_segments())
+        await asyncio.shield(self._load_task)
+
+    async def _load_segments(self):
+        if db.db is None or not settings.LIVE_SEGMENTS_PERSIST:
+            self.transcript_complete = True
+            return
+        try:
+            stored = await db.db.live_segments.find(
+                {"session_id": self.session_id}, {"_id": 0, "session_id": 0, "created_at": 0}
+            ).sort("_id", 1).to_list(length=None)
+        except Exception as e:
+            print(f"⚠️ [{self.session_id}] Could not load live transcript: {e}")
+            self._load_task = None  # try again on the next read
+            return
+        if stored:
+            # Segments mirrored while loading are usually among the stored ones; keep each once
+            stored_keys = {(s["text"], s["start"]) for s in stored}
+            newer = [s for s in self.transcript.segments if (s["text"], s["start"]) not in stored_keys]
+            self.transcript.clear()
+            self.transcript_index.reset()
+            for segment in stored + newer:
+                self.transcript.append(
+                    segment["text"],
+                    start=segment.get("start"),
+                    end=segment.get("end"),
+                    chunk_id=segment.get("chunk_id"),
+                    speaker=segment.get("speaker"),
+                    lang=segment.get("lang")
+                )
+                self.transcript_index.add(segment["text"])
+            print(f"📥 [{self.session_id}] Loaded {len(stored)} live transcript segment(s)")
+        self.transcript_complete = True
+
+    async def _persist_segment(self, segment: dict):
+        if db.db is None or not settings.LIVE_SEGMENTS_PERSIST:
+            return
+        try:
+            await db.db.live_segments.insert_one(
+                {**segment, "session_id": self.session_id, "created_at": datetime.utcnow()}
+            )
+        except Exception as e:
+            print(f"⚠️ [{self.session_id}] Live segment not persisted: {e}")
+
+    async def forget_transcript(self):
+        """Drop the persisted segments (the session was cleared)."""
+        if db.db is None:
+            return
+        try:
+            await db.db.live_segments.delete_many({"session_id": self.session_id})
+        except Exception as e:
+            print(f"⚠️ [{self.session_id}] Could not delete live transcript: {e}")
+
+    def _on_transcript(self, text: str, chunk_id: Optional[int] = None,
+                       start: Optional[float] = None, end: Optional[float] = None):
+        """Transcriber callback (runs on the event loop, in chunk order, already deduped)."""
+        segment = self.transcript.append(text, start=start, end=end, chunk_id=chunk_id)
+        self.transcript_index.add(text)
+        # Only the worker transcribing the audio writes it; mirrors load it from there
+        asyncio.ensure_future(self._persist_segment(segment))
+        self.transcription_queue.append(text)
+        self.last_active = time.monotonic()
+        if settings.ROLLING_SUMMARY_ENABLED:
+            self.rolling_summarizer.feed(text)
+        # Push immediately to this session's sockets
+        asyncio.ensure_future(self.broadcast({
+            "type": "transcript",
+            "text": text,
+            "segment": segment
+        }))
+        print(f"✅ [{self.session_id}] NEW transcription queued: {text}")
+
+    async def start(self, local_audio: bool = True) -> bool:
+        """Start recording (keeps any transcript already collected)."""
+        self.touch()
+        if self.saved:
+            self.rolling_summarizer.reset()
+            self.saved = False
+        self.is_recording = True
+        self.transcription_queue.clear()
+        self.rolling_summarizer.attach(asyncio.get_running_loop())
+        return await self.transcriber.start_recording(self._on_transcript, local_audio=local_audio)
+
+    async def stop(self):
+        self.touch()
+        self.is_recording = False
+        await self.transcriber.stop_recording()
+
+    def clear(self):
+        self.touch()
+        self.transcript.clear()
+        self.messages = []
+        self.transcription_queue.clear()
+        self.transcript_index.reset()
+        self.rolling_summarizer.reset()
+
+    def drain(self) -> List[str]:
+        """Pop everything waiting for pollers, in arrival order."""
+        texts = list(dict.fromkeys(self.transcription_queue))
+        self.transcription_queue.clear()
+        return texts
+
+    def stats(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "is_recording": self.is_recording,
+            "transcript_chars": self.transcript.char_count,
+            "transcript_segments": len(self.transcript),
+            "transcript_complete": self.transcript_complete,
+            "connections": len(self.connections),
+            "vad": self.transcriber.vad_stats(),
+            "sequencing": self.transcriber.sequencing_stats(),
+            "dedupe": self.transcriber.dedupe_stats(),
+            "queue": self.transcriber.queue_stats()
+        }
+
+    @property
+    def idle(self) -> bool:
+        return not self.is_recording and not self.connections
+
+
+class SessionLimitError(RuntimeError):
+    """Every live session slot is taken by one that is recording or has listeners."""
+
+
+class SessionRegistry:
+    def __init__(self, idle_seconds: int, max_sessions: int):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, LiveSession] = {}
+        self._by_connection: Dict[WebSocket, LiveSession] = {}
+
+    def get(self, session_id: Optional[str] = None) -> LiveSession:
+        """Return the live session, creating it on first use (SessionLimitError if full)."""
+        session_id = session_id or DEFAULT_SESSION_ID
+        session = self.sessions.get(session_id)
+        if session is None:
+            self._prune()
+            if len(self.sessions) >= self.max_sessions:
+                self._make_room()
+            session = LiveSession(session_id)
+            self.sessions[session_id] = session
+            # Pick up what was said before this worker had a copy (else on the first transcript read)
+            try:
+                asyncio.get_running_loop().create_task(session.load_transcript())
+            except RuntimeError:
+                pass
+        return session
+
+    def find(self, session_id: Optional[str] = None) -> Optional[LiveSession]:
+        """The live session if it exists (read-only lookups must not create one); the default always does."""
+        if not session_id or session_id == DEFAULT_SESSION_ID:
+            return self.get(DEFAULT_SESSION_ID)
+        return self.sessions.get(session_id)
+
+    def attach(self, websocket: WebSocket, session_id: Optional[str] = None) -> LiveSession:
+        session = self.get(session_id)
+        manager.subscribe(websocket, session.topic)
+        session.touch()
+        self._by_connection[websocket] = session
+        return session
+
+    def detach(self, websocket: WebSocket):
+        session = self._by_connection.pop(websocket, None)
+        if session is not None:
+            manager.unsubscribe(websocket, session.topic)
+            session.touch()
+        for live in self.sessions.values():
+            live.producers.discard(websocket)
+
+    def for_connection(self, websocket: WebSocket) -> Optional[LiveSession]:
+        return self._by_connection.get(websocket)
+
+    def remove(self, session_id: str):
+        """Forget a session that is not recording."""
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.rolling_summarizer.reset()
+
+    def _prune(self):
+        """Drop sessions nobody has recorded in or listened to for idle_seconds."""
+        cutoff = time.monotonic() - self.idle_seconds
+        stale = [
+            sid for sid, s in self.sessions.items()
+            if sid != DEFAULT_SESSION_ID and s.idle and s.last_active < cutoff
+        ]
+        for sid in stale:
+            self.remove(sid)
+
+    def _make_room(self):
+        """At the cap: drop the least recently active idle session, if there is one."""
+        idle = [s for sid, s in self.sessions.items() if sid != DEFAULT_SESSION_ID and s.idle]
+        if not idle:
+            raise SessionLimitError(f"{len(self.sessions)} live sessions already active")
+        self.remove(min(idle, key=lambda s: s.last_active).session_id)
+
+    def apply_remote(self, topic: Optional[str], message: dict):
+        """Backplane hook: route another worker's session event to the local copy of that session."""
+        if topic is None or not topic.startswith("session:"):
+            return
+        session_id = topic[len("session:"):]
+        session = self.sessions.get(session_id)
+        if session is None:
+            if message.get("type") != "status" or message.get("status") != "recording":
+                return  # nothing to mirror into until it records here too
+            try:
+                session = self.get(session_id)
+            except SessionLimitError as e:
+                print(f"⚠️ Not mirroring live session '{session_id}': {e}")
+                return
+        session.apply_remote(message)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "recording": sum(1 for s in self.sessions.values() if s.is_recording),
+            "connections": len(self._by_connection)
+        }
+
+
+session_registry = SessionRegistry(
+    idle_seconds=settings.LIVE_SESSION_IDLE_SECONDS,
+    max_sessions=settings.LIVE_SESSION_MAX
+)
+backplane.remote_handlers.append(session_registry.apply_remote)
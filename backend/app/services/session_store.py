@@ -0,0 +1,130 @@
+"""
+Saved-session storage, split across collections:
+- sessions:            small header (name, timestamp, generated summary/terms/Q&A,
+                       counters and a preview for the History list)
+- session_transcripts: the transcript in chunks of up to STORED_TRANSCRIPT_CHUNK_CHARS, by seq
+- session_messages:    chat messages, one document each, by seq
+Headers stay small however long the lecture, each endpoint reads only the part
+it needs, and no document gets near MongoDB's 16 MB limit.
+Sessions saved before the split keep transcript/chat_messages inline in the
+header; the readers here fall back to those fields.
+"""
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+from app.database import db
+
+STORED_TRANSCRIPT_CHUNK_CHARS = 8000
+PREVIEW_CHARS = 240
+
+# Header fields that only exist on sessions saved before the split
+_LEGACY_FIELDS = ("transcript", "chat_messages", "chat")
+
+
+def chunk_transcript(text: str, max_chars: int = STORED_TRANSCRIPT_CHUNK_CHARS) -> List[str]:
+    """Split at whitespace into chunks of at most max_chars; "".join(chunks) == text."""
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = text.rfind(" ", start + 1, start + max_chars)
+        end = end + 1 if end != -1 else start + max_chars
+        chunks.append(text[start:end])
+        start = end
+    if start < len(text):
+        chunks.append(text[start:])
+    return chunks
+
+
+async def create_session(header: dict, transcript: str, chat: List[dict]) -> dict:
+    """Insert a saved session. Returns the stored header."""
+    session_id = header["id"]
+    chunks = chunk_transcript(transcript)
+    header = {
+        **header,
+        "transcript_chars": len(transcript),
+        "transcript_chunks": len(chunks),
+        "preview": transcript[:PREVIEW_CHARS],
+        "chat_count": len(chat)
+    }
+    # Tags this call's children, so a failed save only ever removes what it wrote itself
+    save_id = uuid.uuid4().hex
+    # Children first: once the header is visible, its transcript and chat are complete
+    try:
+        if chunks:
+            await db.db.session_transcripts.insert_many([
+                {"session_id": session_id, "seq": seq, "text": text, "save_id": save_id}
+                for seq, text in enumerate(chunks)
+            ])
+        if chat:
+            await db.db.session_messages.insert_many([
+                {**message, "session_id": session_id, "seq": seq, "save_id": save_id}
+                for seq, message in enumerate(chat)
+            ])
+        await db.db.sessions.insert_one(dict(header))
+    except Exception:
+        # Don't leave chunks/messages behind with no header pointing at them
+        try:
+            await db.db.session_transcripts.delete_many({"session_id": session_id, "save_id": save_id})
+            await db.db.session_messages.delete_many({"session_id": session_id, "save_id": save_id})
+        except Exception as e:
+            print(f"⚠️ Failed to clean up session {session_id} after a failed save: {e}")
+        raise
+    return header
+
+
+async def get_header(session_id: str, fields: Optional[List[str]] = None) -> Optional[dict]:
+    """The session header (only `fields` if given), without any inline legacy transcript/chat."""
+    if fields:
+        projection = {"_id": 0, **{f: 1 for f in fields}}
+    else:
+        projection = {"_id": 0, **{f: 0 for f in _LEGACY_FIELDS}}
+    return await db.db.sessions.find_one({"id": session_id}, projection)
+
+
+async def get_transcript(session_id: str) -> Optional[str]:
+    """Full transcript text; None if the session doesn't exist."""
+    header = await db.db.sessions.find_one(
+        {"id": session_id}, {"_id": 0, "transcript_chunks": 1, "transcript": 1}
+    )
+    if header is None:
+        return None
+    if "transcript_chunks" not in header:
+        return header.get("transcript", "")  # saved before the split
+    cursor = db.db.session_transcripts.find({"session_id": session_id}, {"_id": 0, "text": 1}).sort("seq", 1)
+    return "".join([chunk["text"] async for chunk in cursor])
+
+
+async def get_chat(session_id: str) -> List[dict]:
+    header = await db.db.sessions.find_one(
+        {"id": session_id}, {"_id": 0, "chat_count": 1, "chat_messages": 1, "chat": 1}
+    )
+    if header is None:
+        return []
+    if "chat_count" not in header:
+        return header.get("chat_messages") or header.get("chat") or []
+    cursor = db.db.session_messages.find(
+        {"session_id": session_id}, {"_id": 0, "session_id": 0, "seq": 0, "save_id": 0}
+    ).sort("seq", 1)
+    return await cursor.to_list(length=None)
+
+
+async def iter_transcripts() -> AsyncIterator[Tuple[str, str]]:
+    """(session_id, transcript) for every split session, in one ordered scan (used to build indexes)."""
+    cursor = db.db.session_transcripts.find({}, {"_id": 0}).sort([("session_id", 1), ("seq", 1)])
+    current, parts = None, []
+    async for chunk in cursor:
+        if chunk["session_id"] != current:
+            if current is not None:
+                yield current, "".join(parts)
+            current, parts = chunk["session_id"], []
+        parts.append(chunk["text"])
+    if current is not None:
+        yield current, "".join(parts)
+
+
+async def delete_session(session_id: str) -> bool:
+    result = await db.db.sessions.delete_one({"id": session_id})
+    if not result.deleted_count:
+        return False
+    await db.db.session_transcripts.delete_many({"session_id": session_id})
+    await db.db.session_messages.delete_many({"session_id": session_id})
+    return True
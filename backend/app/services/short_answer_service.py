@@ -1,18 +1,25 @@
 from app.services.ai_service import AIService
 from app.database import db
+from app.services.search_index import search_index
 from app.models.short_answer import ShortAnswerQuestion, ShortAnswerQuestionSet, AnswerEvaluationResult
+from app.utils.chunking import split_transcript, allocate_counts, map_chunks, dedupe_by, normalize_text_key
 import uuid
 
 class ShortAnswerService:
     @staticmethod
-    async def generate_questions(session_id: str, transcript_text: str, num_questions: int = 10) -> ShortAnswerQuestionSet:
+    async def generate_questions(session_id: str, transcript_text: str, num_questions: int = 10, save: bool = True) -> ShortAnswerQuestionSet:
         qs_id = str(uuid.uuid4())
         
-        prompt = f"""
+        # Long transcripts are split and the requested count shared out across the chunks
+        chunks = split_transcript(transcript_text)
+        work = [(c, n) for c, n in zip(chunks, allocate_counts(num_questions, chunks)) if n > 0]
+        
+        async def generate_part(chunk: str, idx: int) -> list:
+            prompt = f"""
         Generate short-answer questions (requiring 2-5 sentences) based on the transcript.
         
         Parameters:
-        - Number of questions: {num_questions}
+        - Number of questions: {work[idx][1]}
         - Focus: Conceptual understanding
         
         Format Requirement:
@@ -25,12 +32,17 @@ class ShortAnswerService:
         - "topic": Subject area
         
         TRANSCRIPT:
-        {transcript_text[:15000]}
+        {chunk}
         """
+            ai_data = await AIService.generate_json(prompt)
+            return ai_data.get("questions", [])
         
         try:
-            ai_data = await AIService.generate_json(prompt)
-            data = ai_data.get("questions", [])
+            parts = await map_chunks([c for c, _ in work], generate_part)
+            data = dedupe_by(
+                (q for part in parts for q in part),
+                key=lambda q: normalize_text_key(q.get("question_text", ""))
+            )[:num_questions]
             
             parsed_questions = []
             for idx, q in enumerate(data):
@@ -51,8 +63,9 @@ class ShortAnswerService:
                 questions=parsed_questions
             )
             
-            if db.db is not None:
+            if save and db.db is not None:
                 await db.db.short_answer_question_sets.insert_one(qs.dict())
+                await search_index.index_artifact("short_answer", qs.dict())
                 
             return qs
         except Exception as e:
@@ -0,0 +1,193 @@
+"""
+Pluggable speech-to-text backends.
+Audio is handed over as in-memory bytes; no temp files are written.
+
+- ondemand: upload to Cloudinary, then OnDemand transcribes the URL (original path)
+- inline:   POST the audio bytes straight to an OpenAI-compatible /audio/transcriptions
+            endpoint (OpenAI, faster-whisper-server, whisper.cpp server, ...)
+- stub:     no network; returns canned text for local testing
+
+Backends are async and share one keep-alive HTTP client, so consecutive chunks
+reuse the same TCP/TLS connection instead of opening a new one per request.
+"""
+import asyncio
+import io
+import os
+from typing import Dict, List, Optional, Type
+import httpx
+from app.config import settings
+
+# Try to import Cloudinary
+try:
+    import cloudinary
+    import cloudinary.uploader
+    CLOUDINARY_AVAILABLE = True
+except ImportError:
+    CLOUDINARY_AVAILABLE = False
+    print("⚠️  Cloudinary not available")
+
+# File extension / MIME type per audio format
+AUDIO_FORMATS = {
+    "webm": "audio/webm",
+    "wav": "audio/wav",
+}
+
+# Status codes worth retrying: rate limited or a transient server-side failure
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled client shared by every session's STT calls."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.STT_REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.STT_MAX_WORKERS,
+                max_keepalive_connections=settings.STT_MAX_WORKERS
+            )
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class STTRetryableError(Exception):
+    """A transient failure: the same chunk may succeed if sent again."""
+
+
+def _check_status(response: httpx.Response, chunk_id: int) -> bool:
+    """True for 200; raises for retryable statuses; False for anything else."""
+    if response.status_code == 200:
+        return True
+    if response.status_code in RETRYABLE_STATUS:
+        raise STTRetryableError(f"HTTP {response.status_code}")
+    print(f"   [{chunk_id}] STT HTTP {response.status_code}")
+    return False
+
+
+class STTBackend:
+    """Base class: transcribe one chunk of encoded audio held in memory."""
+
+    name = "base"
+    available = False
+
+    async def transcribe(self, audio: bytes, audio_format: str, chunk_id: int) -> Optional[str]:
+        raise NotImplementedError
+
+
+class CloudinaryOnDemandBackend(STTBackend):
+    """Upload to Cloudinary and let OnDemand fetch it by URL."""
+
+    name = "ondemand"
+
+    def __init__(self):
+        self.api_key = os.getenv("ONDEMAND_API_KEY")
+        self.api_url = "https://api.on-demand.io/services/v1/public/service/execute/speech_to_text"
+
+        cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
+        api_key = os.getenv("CLOUDINARY_API_KEY")
+        api_secret = os.getenv("CLOUDINARY_API_SECRET")
+
+        self.cloudinary_configured = False
+        if CLOUDINARY_AVAILABLE and cloud_name and api_key and api_secret:
+            if cloud_name != "your_cloud_name":
+                cloudinary.config(
+                    cloud_name=cloud_name,
+                    api_key=api_key,
+                    api_secret=api_secret
+                )
+                self.cloudinary_configured = True
+                print("✅ Cloudinary configured")
+
+        self.available = bool(self.cloudinary_configured and self.api_key)
+
+    async def transcribe(self, audio: bytes, audio_format: str, chunk_id: int) -> Optional[str]:
+        # Cloudinary treats WebM as video, but raw is safer for chunks
+        resource_type = "raw" if audio_format == "webm" else "auto"
+
+        buffer = io.BytesIO(audio)
+        buffer.name = f"chunk_{chunk_id}.{audio_format}"
+        # The Cloudinary SDK is blocking; keep it off the event loop
+        result = await asyncio.to_thread(
+            cloudinary.uploader.upload,
+            buffer,
+            resource_type=resource_type,
+            folder="stt_audio",
+        )
+        audio_url = result.get("secure_url")
+        if not audio_url:
+            return None
+
+        print(f"   [{chunk_id}] Uploaded, transcribing...")
+
+        response = await get_http_client().post(
+            self.api_url,
+            headers={"apikey": self.api_key, "Content-Type": "application/json"},
+            json={"audioUrl": audio_url}
+        )
+        if not _check_status(response, chunk_id):
+            return None
+        return response.json().get("data", {}).get("text", "").strip()
+
+
+class InlineHTTPBackend(STTBackend):
+    """Send audio bytes in the request body (multipart), no intermediate storage."""
+
+    name = "inline"
+
+    def __init__(self):
+        self.api_url = os.getenv("STT_INLINE_URL")
+        self.api_key = os.getenv("STT_INLINE_API_KEY")
+        self.model = os.getenv("STT_INLINE_MODEL", "whisper-1")
+        self.available = bool(self.api_url)
+
+    async def transcribe(self, audio: bytes, audio_format: str, chunk_id: int) -> Optional[str]:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        response = await get_http_client().post(
+            self.api_url,
+            headers=headers,
+            files={"file": (f"chunk_{chunk_id}.{audio_format}", audio, AUDIO_FORMATS.get(audio_format, "application/octet-stream"))},
+            data={"model": self.model}
+        )
+        if not _check_status(response, chunk_id):
+            return None
+        return response.json().get("text", "").strip()
+
+
+class StubBackend(STTBackend):
+    """Offline backend for tests: cycles through canned transcripts and records what it received."""
+
+    name = "stub"
+    available = True
+
+    def __init__(self, responses: Optional[List[str]] = None):
+        self.responses = responses or ["This is a stub transcription."]
+        self.received: List[tuple] = []
+
+    async def transcribe(self, audio: bytes, audio_format: str, chunk_id: int) -> Optional[str]:
+        self.received.append((chunk_id, audio_format, len(audio)))
+        return self.responses[(len(self.received) - 1) % len(self.responses)]
+
+
+STT_BACKENDS: Dict[str, Type[STTBackend]] = {
+    CloudinaryOnDemandBackend.name: CloudinaryOnDemandBackend,
+    InlineHTTPBackend.name: InlineHTTPBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def create_stt_backend(name: Optional[str] = None) -> STTBackend:
+    name = (name or os.getenv("STT_BACKEND", "ondemand")).lower()
+    backend_cls = STT_BACKENDS.get(name)
+    if backend_cls is None:
+        print(f"⚠️  Unknown STT_BACKEND '{name}', falling back to ondemand")
+        backend_cls = CloudinaryOnDemandBackend
+    return backend_cls()
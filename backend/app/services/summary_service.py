@@ -1,6 +1,9 @@
 from app.services.ai_service import AIService
 from app.database import db
+from app.services.search_index import search_index
 from app.models.summary import Summary
+from app.utils.chunking import split_transcript, map_chunks, dedupe_by, normalize_text_key
+import json
 import uuid
 
 class SummaryService:
@@ -14,11 +17,12 @@ class SummaryService:
             "detailed": "3-5 paragraphs"
         }.get(summary_type, "1-2 paragraphs")
         
-        prompt = f"""
-        Generate a structured summary of the transcript.
+        def build_prompt(material: str, length: str, label: str = "TRANSCRIPT") -> str:
+            return f"""
+        Generate a structured summary of the {label.lower()}.
         
         Parameters:
-        - Length: {length_desc}
+        - Length: {length}
         - Include Key Points: {include_key_points}
         - Include Action Items: {include_action_items}
         
@@ -29,12 +33,33 @@ class SummaryService:
         - "action_items": Array of strings (homework, tasks mentioned)
         - "main_topics": Array of strings
         
-        TRANSCRIPT:
-        {transcript_text[:20000]}
+        {label}:
+        {material}
         """
         
         try:
-            ai_data = await AIService.generate_json(prompt)
+            chunks = split_transcript(transcript_text)
+            if len(chunks) <= 1:
+                ai_data = await AIService.generate_json(build_prompt(transcript_text, length_desc))
+            else:
+                # Map: summarize each part concurrently. Reduce: merge the partial summaries.
+                async def summarize_part(chunk: str, idx: int) -> dict:
+                    return await AIService.generate_json(build_prompt(chunk, "1 paragraph"))
+                
+                partials = [p for p in await map_chunks(chunks, summarize_part) if isinstance(p, dict)]
+                material = json.dumps(
+                    [{"part": i + 1, **p} for i, p in enumerate(partials)],
+                    ensure_ascii=False,
+                    indent=1
+                )
+                ai_data = await AIService.generate_json(
+                    build_prompt(material, length_desc, label="PARTIAL SUMMARIES OF CONSECUTIVE LECTURE PARTS")
+                )
+                # Keep action items from every part even if the merge step drops some
+                ai_data["action_items"] = dedupe_by(
+                    ai_data.get("action_items", []) + [a for p in partials for a in p.get("action_items", [])],
+                    key=normalize_text_key
+                )
             
             main_summary = ai_data.get("main_summary", "")
             
@@ -60,6 +85,7 @@ class SummaryService:
             
             if db.db is not None:
                 await db.db.summaries.insert_one(summary.dict())
+                await search_index.index_artifact("summary_report", summary.dict())
                 
             return summary
         except Exception as e:
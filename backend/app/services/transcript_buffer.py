@@ -0,0 +1,94 @@
+"""
+Live transcript stored as a list of timestamped segments.
+Appends are O(1); the joined text is built lazily and cached until the next
+append, and segments can be sliced by time (e.g. "the last 5 minutes")
+without rescanning the text.
+"""
+import time
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+_DEVANAGARI = range(0x0900, 0x0980)
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Script-based tag for bilingual lectures: 'hi', 'en' or 'hi-en' (mixed)."""
+    devanagari = latin = 0
+    for ch in text:
+        if ord(ch) in _DEVANAGARI:
+            devanagari += 1
+        elif ch.isascii() and ch.isalpha():
+            latin += 1
+    total = devanagari + latin
+    if not total:
+        return None
+    if devanagari / total > 0.8:
+        return "hi"
+    if latin / total > 0.8:
+        return "en"
+    return "hi-en"
+
+
+class TranscriptBuffer:
+    """
+    Segments are dicts (JSON/Mongo friendly):
+    {"seq", "text", "start", "end", "chunk_id", "speaker", "lang"}
+    with start/end as epoch seconds. Segments arrive in spoken order, so
+    end times are kept sorted for bisecting.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.segments: List[dict] = []
+        self._ends: List[float] = []
+        self._text: Optional[str] = ""
+        self.char_count = 0
+
+    def append(self, text: str, start: Optional[float] = None, end: Optional[float] = None,
+               chunk_id: Optional[int] = None, speaker: Optional[str] = None,
+               lang: Optional[str] = None) -> dict:
+        end = end if end is not None else time.time()
+        start = start if start is not None else end
+        # Keep times monotonic even if a late chunk reports an earlier clock
+        if self._ends and end < self._ends[-1]:
+            end = self._ends[-1]
+            start = min(start, end)
+        segment = {
+            "seq": len(self.segments) + 1,
+            "text": text,
+            "start": start,
+            "end": end,
+            "chunk_id": chunk_id,
+            "speaker": speaker,
+            "lang": lang if lang is not None else detect_language(text)
+        }
+        self.segments.append(segment)
+        self._ends.append(end)
+        self.char_count += len(text) + 1
+        self._text = None
+        return segment
+
+    @property
+    def text(self) -> str:
+        """Whole transcript as one string (cached until the next append)."""
+        if self._text is None:
+            self._text = "".join(s["text"] + " " for s in self.segments)
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> List[dict]:
+        """Segments that ended at or after `start` and ended by `end` (epoch seconds)."""
+        lo = bisect_left(self._ends, start) if start is not None else 0
+        hi = bisect_right(self._ends, end) if end is not None else len(self.segments)
+        return self.segments[lo:hi]
+
+    def text_between(self, start: Optional[float] = None, end: Optional[float] = None) -> str:
+        return " ".join(s["text"] for s in self.between(start, end))
+
+    def text_since(self, seconds: float) -> str:
+        """What was said in the last `seconds` (relative to now)."""
+        return self.text_between(start=time.time() - seconds)
@@ -0,0 +1,99 @@
+"""
+Incremental BM25 index over a live transcript.
+Text is split into overlapping word windows as it arrives, so Q&A prompts can
+carry the few most relevant windows instead of the whole lecture.
+"""
+import re
+from collections import Counter
+from typing import List, Tuple
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class TranscriptIndex:
+    """
+    Overlapping windows of `window_words` words, advancing by window - overlap.
+    The trailing partial window is always searchable so the latest speech is never missed.
+    """
+
+    def __init__(self, window_words: int = 120, overlap_words: int = 30, k1: float = 1.5, b: float = 0.75):
+        self.window_words = window_words
+        self.stride = window_words - overlap_words
+        self.k1 = k1
+        self.b = b
+        self.reset()
+
+    def reset(self):
+        self.words: List[str] = []
+        self.chunk_spans: List[Tuple[int, int]] = []
+        self.chunk_tfs: List[Counter] = []
+        self.doc_freq: Counter = Counter()
+        self.char_count = 0
+        self._next_start = 0
+
+    def add(self, text: str):
+        """Append a transcript segment, sealing any windows it completes."""
+        new_words = text.split()
+        if not new_words:
+            return
+        self.words.extend(new_words)
+        self.char_count += len(text) + 1
+
+        while len(self.words) - self._next_start >= self.window_words:
+            start = self._next_start
+            end = start + self.window_words
+            tf = Counter(tokenize(" ".join(self.words[start:end])))
+            self.chunk_spans.append((start, end))
+            self.chunk_tfs.append(tf)
+            self.doc_freq.update(tf.keys())
+            self._next_start += self.stride
+
+    def _candidates(self) -> Tuple[List[Tuple[int, int]], List[Counter]]:
+        spans = list(self.chunk_spans)
+        tfs = list(self.chunk_tfs)
+        # Include the unsealed tail unless it is already fully covered by the last window
+        tail_start = self._next_start
+        if tail_start < len(self.words) and (not spans or spans[-1][1] < len(self.words)):
+            spans.append((tail_start, len(self.words)))
+            tfs.append(Counter(tokenize(" ".join(self.words[tail_start:]))))
+        return spans, tfs
+
+    def search(self, query: str, top_k: int = 5) -> List[str]:
+        """Return the top_k windows for the query, in transcript order."""
+        spans, tfs = self._candidates()
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not spans or not terms:
+            return []
+
+        n_docs = len(spans)
+        tf = np.array([[doc.get(t, 0) for t in terms] for doc in tfs], dtype=np.float64)
+        doc_len = np.array([sum(doc.values()) for doc in tfs], dtype=np.float64)
+        # The tail window is not in doc_freq yet; count it on the fly
+        df = np.array([self.doc_freq.get(t, 0) for t in terms], dtype=np.float64)
+        if len(tfs) > len(self.chunk_tfs):
+            df += np.array([1.0 if tfs[-1].get(t) else 0.0 for t in terms])
+
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        avg_len = doc_len.mean() if doc_len.mean() > 0 else 1.0
+        norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+        scores = (tf * (self.k1 + 1) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+        ranked = [i for i in np.argsort(-scores)[:top_k] if scores[i] > 0]
+        return [" ".join(self.words[spans[i][0]:spans[i][1]]) for i in sorted(ranked)]
+
+    def context_for(self, question: str, transcript: str, top_k: int = 5, min_chars: int = 8000) -> str:
+        """
+        Build the transcript context for a question.
+        Short transcripts (or no matches) fall back to the full text.
+        """
+        if len(transcript) < min_chars:
+            return transcript
+        excerpts = self.search(question, top_k)
+        if not excerpts:
+            return transcript[-min_chars:]
+        return "\n...\n".join(excerpts)
@@ -0,0 +1,314 @@
+"""
+Voice-activity detection for audio headed to the STT API.
+Browser WebM/Opus chunks are decoded to 16 kHz mono PCM, scored frame by frame
+with WebRTC VAD and re-cut at pauses, so silence never reaches the (paid) STT
+API and words are not split by fixed time slices.
+"""
+import io
+from typing import List, Optional, Tuple
+import numpy as np
+
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+    print("⚠️  webrtcvad not available (WebSocket audio will not be VAD-gated)")
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+    print("⚠️  PyAV not available (WebSocket audio cannot be decoded for VAD)")
+
+VAD_AVAILABLE = WEBRTCVAD_AVAILABLE and AV_AVAILABLE
+
+# EBML element ids: file header magic, the start of a Cluster (media data), and a Cluster's Timecode
+_EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+_CLUSTER_ID = b"\x1f\x43\xb6\x75"
+_TIMECODE_ID = 0xE7
+
+
+def _cluster_at(data, i: int) -> Optional[bool]:
+    """
+    Whether a Cluster starts at data[i] (its id, a size, then the Timecode element);
+    None if data ends before that can be told. Filters out the id occurring in Opus data.
+    """
+    if data[i:i + 4] != _CLUSTER_ID:
+        return False
+    if i + 4 >= len(data):
+        return None
+    first = data[i + 4]
+    if first == 0:
+        return False
+    size_len = 9 - first.bit_length()  # EBML variable-length size: leading zeros + 1
+    if i + 4 + size_len >= len(data):
+        return None
+    return data[i + 4 + size_len] == _TIMECODE_ID
+
+
+class WebMDecoder:
+    """
+    Decode a MediaRecorder WebM stream, arriving as timeslice chunks, to int16 PCM.
+    Timeslices don't line up with Clusters, and a demuxer handed a chunk that starts
+    mid-Cluster skips ahead to the next one, so chunks can't be decoded on their own.
+    Instead the bytes since the start of the current Cluster are kept and decoded
+    behind the stream header on every chunk, and only audio past what was already
+    returned is emitted. Clusters are dropped once a later one has been decoded past.
+    """
+
+    # One Cluster is normally a few seconds; if none starts within this many bytes, start over
+    MAX_PENDING_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self.reset()
+
+    def reset(self):
+        self.header: Optional[bytes] = None
+        self._pending = bytearray()
+        # Stream time (seconds) up to which PCM has been returned
+        self._emitted_until = float("-inf")
+        # Seconds of stream time the last decode() skipped over (audio the demuxer lost)
+        self.last_gap = 0.0
+
+    def container_bytes(self, chunk: bytes) -> bytes:
+        """The chunk as a standalone WebM file (header prepended when missing)."""
+        if chunk.startswith(_EBML_MAGIC):
+            cluster = chunk.find(_CLUSTER_ID)
+            if cluster > 0:
+                self.header = chunk[:cluster]
+            return chunk
+        return self.header + chunk if self.header else chunk
+
+    def _append(self, chunk: bytes):
+        if chunk.startswith(_EBML_MAGIC):
+            # A new recording (MediaRecorder restarted): new header, new timeline
+            self.reset()
+        self._pending += chunk
+        if self.header is None and self._pending.startswith(_EBML_MAGIC):
+            cluster = self._find_cluster(0)
+            if cluster is not None:
+                self.header = bytes(self._pending[:cluster])
+                del self._pending[:cluster]
+        elif len(self._pending) > self.MAX_PENDING_BYTES:
+            print("⚠️ No WebM cluster boundary found; dropping buffered audio")
+            self._pending = bytearray(chunk)
+
+    def _find_cluster(self, start: int, last: bool = False, end: Optional[int] = None) -> Optional[int]:
+        """Offset of the first (or last) Cluster start in the pending bytes within [start, end)."""
+        data = self._pending
+        end = len(data) if end is None else end
+        i = data.rfind(_CLUSTER_ID, start, end) if last else data.find(_CLUSTER_ID, start, end)
+        while i != -1:
+            if _cluster_at(data, i):
+                return i
+            i = data.rfind(_CLUSTER_ID, start, i) if last else data.find(_CLUSTER_ID, i + 1, end)
+        return None
+
+    def decode(self, chunk: bytes) -> Optional[np.ndarray]:
+        """PCM for the audio this chunk completes; None if the stream can't be decoded."""
+        if not AV_AVAILABLE:
+            return None
+        self._append(chunk)
+        if self.header is None:
+            # Still waiting for the end of the header; no header at all means we joined mid-stream
+            return np.zeros(0, dtype=np.int16) if self._pending.startswith(_EBML_MAGIC) else None
+
+        data = self.header + bytes(self._pending)
+        try:
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=self.sample_rate)
+            parts = []
+            emitted_until = self._emitted_until
+            gap = 0.0
+            with av.open(io.BytesIO(data), format="webm") as container:
+                for packet in container.demux(audio=0):
+                    # The last block may be cut off mid-way; it is decoded whole next time
+                    if packet.size == 0 or packet.is_corrupt:
+                        continue
+                    try:
+                        frames = packet.decode()
+                    except av.error.FFmpegError:
+                        continue
+                    for frame in frames:
+                        start = float(frame.pts * frame.time_base) if frame.pts is not None else None
+                        if start is not None and start < emitted_until - 0.001:
+                            continue  # returned by an earlier call
+                        if start is not None:
+                            # WebM timestamps are whole milliseconds; anything beyond that is missing audio
+                            if emitted_until != float("-inf") and start > emitted_until + 0.001:
+                                gap += start - emitted_until
+                            emitted_until = start + frame.samples / frame.sample_rate
+                        for out in resampler.resample(frame):
+                            parts.append(out.to_ndarray().reshape(-1))
+            for out in resampler.resample(None):
+                parts.append(out.to_ndarray().reshape(-1))
+        except Exception as e:
+            print(f"⚠️ Could not decode audio chunk: {e}")
+            return None
+        self._emitted_until = emitted_until
+        self.last_gap = gap
+
+        # Clusters before the newest one are fully decoded now. Keep the one just before it
+        # too: the decoder drops the Opus pre-skip from the first packet after the header,
+        # so that packet must be one already returned.
+        last = self._find_cluster(1, last=True)
+        if last is not None:
+            previous = self._find_cluster(1, last=True, end=last)
+            if previous is not None:
+                del self._pending[:previous]
+
+        if not parts:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(parts).astype(np.int16)
+
+
+class SpeechChunker:
+    """
+    Re-chunk a PCM stream at pauses instead of fixed time slices.
+
+    Audio is buffered and scored with WebRTC VAD in 30 ms frames. A chunk is cut
+    in the middle of the first pause (pause_ms of non-speech) after min_seconds;
+    if none comes by max_seconds it is cut at the longest pause available, or
+    hard at max_seconds, in which case the next chunk repeats the last overlap_ms
+    so a word split by the cut is heard whole at least once.
+    Chunks whose speech ratio is below silence_ratio are dropped, and leading
+    silence is trimmed so quiet stretches never build up a chunk.
+    """
+
+    FRAME_MS = 30
+
+    def __init__(self, sample_rate: int = 16000, aggressiveness: int = 2,
+                 min_seconds: float = 2.0, max_seconds: float = 12.0,
+                 pause_ms: int = 300, overlap_ms: int = 200, silence_ratio: float = 0.05):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * self.FRAME_MS // 1000
+        self.min_frames = int(min_seconds * 1000 / self.FRAME_MS)
+        self.max_frames = max(int(max_seconds * 1000 / self.FRAME_MS), self.min_frames + 1)
+        self.pause_frames = max(1, pause_ms // self.FRAME_MS)
+        self.overlap_frames = overlap_ms // self.FRAME_MS
+        self.silence_ratio = silence_ratio
+        self.vad = webrtcvad.Vad(aggressiveness) if WEBRTCVAD_AVAILABLE else None
+        self.reset()
+
+    def reset(self):
+        self._frames: List[np.ndarray] = []
+        self._voiced: List[bool] = []
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self.chunks_in = 0
+        self.chunks_out = 0
+        self.dropped = 0
+        self.hard_cuts = 0
+        self.speech_frames = 0
+        self.total_frames = 0
+        self.last_speech_ratio = 0.0
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        return self.vad is not None and self.vad.is_speech(frame.tobytes(), self.sample_rate)
+
+    def feed(self, pcm: np.ndarray) -> List[np.ndarray]:
+        """Add int16 mono PCM; return any chunks that are now complete."""
+        self.chunks_in += 1
+        pcm = np.concatenate([self._remainder, pcm.astype(np.int16)])
+        n_frames = len(pcm) // self.frame_samples
+        self._remainder = pcm[n_frames * self.frame_samples:]
+
+        voiced_new = 0
+        for i in range(n_frames):
+            frame = pcm[i * self.frame_samples:(i + 1) * self.frame_samples]
+            voiced = self._is_speech(frame)
+            voiced_new += voiced
+            self._frames.append(frame)
+            self._voiced.append(voiced)
+        self.speech_frames += voiced_new
+        self.total_frames += n_frames
+        self.last_speech_ratio = voiced_new / n_frames if n_frames else 0.0
+
+        self._trim_leading_silence()
+        chunks = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk = self._emit(*cut)
+            if chunk is not None:
+                chunks.append(chunk)
+        return chunks
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Return whatever is buffered (e.g. when recording stops) if it contains speech."""
+        self._remainder = np.zeros(0, dtype=np.int16)
+        if not self._frames:
+            return None
+        return self._emit(len(self._frames), hard=False)
+
+    def _trim_leading_silence(self):
+        """Keep at most one pause worth of silence in front of the first speech frame."""
+        try:
+            first_speech = self._voiced.index(True)
+        except ValueError:
+            first_speech = len(self._voiced)
+        excess = first_speech - self.pause_frames
+        if excess > 0:
+            del self._frames[:excess]
+            del self._voiced[:excess]
+
+    def _pauses(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """(start, length) of non-speech runs of at least pause_frames within [start, end)."""
+        runs = []
+        run_start = None
+        for i in range(start, end):
+            if not self._voiced[i]:
+                if run_start is None:
+                    run_start = i
+            elif run_start is not None:
+                if i - run_start >= self.pause_frames:
+                    runs.append((run_start, i - run_start))
+                run_start = None
+        if run_start is not None and end - run_start >= self.pause_frames:
+            runs.append((run_start, end - run_start))
+        return runs
+
+    def _find_cut(self) -> Optional[Tuple[int, bool]]:
+        """(frame index to cut at, whether it is a hard cut), or None to keep buffering."""
+        n = len(self._frames)
+        if n < self.min_frames:
+            return None
+        # A pause only counts once it is complete (speech resumed after it) or long enough already
+        pauses = self._pauses(self.min_frames, min(n, self.max_frames))
+        if pauses:
+            start, length = pauses[0]
+            return start + length // 2, False
+        if n < self.max_frames:
+            return None
+        pauses = self._pauses(self.min_frames // 2, self.max_frames)
+        if pauses:
+            start, length = max(pauses, key=lambda p: p[1])
+            return start + length // 2, False
+        self.hard_cuts += 1
+        return self.max_frames, True
+
+    def _emit(self, cut: int, hard: bool) -> Optional[np.ndarray]:
+        frames, voiced = self._frames[:cut], self._voiced[:cut]
+        keep_from = cut - self.overlap_frames if hard else cut
+        del self._frames[:keep_from]
+        del self._voiced[:keep_from]
+
+        ratio = sum(voiced) / len(voiced) if voiced else 0.0
+        if ratio < self.silence_ratio:
+            self.dropped += 1
+            return None
+        self.chunks_out += 1
+        return np.concatenate(frames)
+
+    def stats(self) -> dict:
+        return {
+            "chunks_in": self.chunks_in,
+            "chunks_out": self.chunks_out,
+            "dropped": self.dropped,
+            "hard_cuts": self.hard_cuts,
+            "speech_ratio": round(self.speech_frames / self.total_frames, 3) if self.total_frames else 0.0,
+            "last_speech_ratio": round(self.last_speech_ratio, 3),
+            "buffered_seconds": round(len(self._frames) * self.FRAME_MS / 1000, 2)
+        }
@@ -1,36 +1,142 @@
 from fastapi import WebSocket
-from typing import List, Dict, Any
+from typing import Dict, Iterable, List, Optional, Set
+from app.config import settings
+import asyncio
+import json
 
-# Global state for current session only
-current_session: Dict[str, Any] = {
-    "transcript": "",
-    "is_recording": False,
-    "messages": []
-}
+class _Client:
+    """One socket's outbound side: a bounded queue of serialized messages and the task sending them."""
 
-# Queue for transcription results
-transcription_queue: List[str] = []
+    def __init__(self, websocket: WebSocket, queue_max: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_max)
+        self.topics: Set[str] = set()
+        self.sender: Optional[asyncio.Task] = None
 
 # WebSocket connection manager
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    Fan-out to WebSocket clients without waiting on any one of them.
+    broadcast() serializes a message once and drops it into each target's
+    queue; per-client sender tasks do the actual sends. A client whose queue
+    fills up (or whose send stalls past WS_SEND_TIMEOUT_SECONDS) is disconnected
+    so it can't hold memory or delay anyone else. Clients subscribe to topics
+    (e.g. one live session) and topic broadcasts reach only those clients.
+    """
+
+    def __init__(self, queue_max: int = 100, send_timeout: float = 10.0):
+        self.queue_max = queue_max
+        self.send_timeout = send_timeout
+        self.clients: Dict[WebSocket, _Client] = {}
+        self.topics: Dict[str, Set[WebSocket]] = {}
+        self.sent = 0
+        self.evicted = 0
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
-        # print(f"✅ Client connected. Total connections: {len(self.active_connections)}")
+        client = _Client(websocket, self.queue_max)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self.clients[websocket] = client
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        # print(f"❌ Client disconnected. Total connections: {len(self.active_connections)}")
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        for topic in client.topics:
+            members = self.topics.get(topic)
+            if members is not None:
+                members.discard(websocket)
+                if not members:
+                    del self.topics[topic]
+        if client.sender is not None and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def subscribe(self, websocket: WebSocket, topic: str):
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        client.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(websocket)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.topics.discard(topic)
+        members = self.topics.get(topic)
+        if members is not None:
+            members.discard(websocket)
+            if not members:
+                del self.topics[topic]
+
+    def subscribers(self, topic: str) -> Set[WebSocket]:
+        return self.topics.get(topic, set())
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+    async def broadcast(self, message: dict, connections: Optional[Iterable[WebSocket]] = None,
+                        topic: Optional[str] = None):
+        """
+        Queue a message for every client, for `connections`, or for a topic's subscribers.
+        Never waits on a socket, so one slow client can't delay the others.
+        """
+        if topic is not None:
+            targets = list(self.topics.get(topic, ()))
+        else:
+            targets = list(self.clients if connections is None else connections)
+        if not targets:
+            return
+        text = json.dumps(message, default=str)
+        for websocket in targets:
+            client = self.clients.get(websocket)
+            if client is None:
+                continue
             try:
-                await connection.send_json(message)
+                client.queue.put_nowait(text)
+            except asyncio.QueueFull:
+                print(f"⚠️ WebSocket client {self.queue_max} messages behind, disconnecting")
+                self._evict(client, code=1013)
+
+    async def _send_loop(self, client: _Client):
+        while True:
+            text = await client.queue.get()
+            try:
+                await asyncio.wait_for(client.websocket.send_text(text), timeout=self.send_timeout)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"Error broadcasting: {e}")
+                print(f"Error broadcasting: {e!r}")
+                self._evict(client, code=1011)
+                return
+
+    def _evict(self, client: _Client, code: int):
+        """Drop a slow or broken client; its receive loop sees the close and detaches it."""
+        if self.clients.get(client.websocket) is not client:
+            return
+        self.evicted += 1
+        self.disconnect(client.websocket)
+        # Closing may itself stall on a dead peer; don't make the caller wait for it
+        asyncio.create_task(self._close(client.websocket, code))
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=5)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.clients),
+            "topics": len(self.topics),
+            "queued": sum(c.queue.qsize() for c in self.clients.values()),
+            "sent": self.sent,
+            "evicted": self.evicted
+        }
 
-manager = ConnectionManager()
+manager = ConnectionManager(
+    queue_max=settings.WS_SEND_QUEUE_MAX,
+    send_timeout=settings.WS_SEND_TIMEOUT_SECONDS
+)
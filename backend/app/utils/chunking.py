@@ -0,0 +1,115 @@
+"""
+Helpers for map-reduce over long transcripts.
+Split on sentence boundaries, fan chunk calls out with bounded parallelism,
+then merge and dedupe the per-chunk results.
+"""
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Hashable, Iterable, List, TypeVar
+from app.config import settings
+
+T = TypeVar("T")
+
+# Latin sentence enders plus the Devanagari danda (bilingual lectures)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_END_RE.split(text.strip()) if s]
+
+
+def split_transcript(text: str, max_chars: int = None) -> List[str]:
+    """
+    Pack whole sentences into chunks of at most max_chars.
+    STT output often has no punctuation, so over-long "sentences" are split on whitespace.
+    """
+    max_chars = max_chars or settings.TRANSCRIPT_CHUNK_CHARS
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    pieces: List[str] = []
+    for sentence in split_sentences(text):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        current = ""
+        for word in sentence.split():
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            pieces.append(current)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def allocate_counts(total: int, chunks: List[str]) -> List[int]:
+    """Share `total` items across chunks in proportion to chunk length (largest remainder)."""
+    if not chunks:
+        return []
+    lengths = [len(c) for c in chunks]
+    size = sum(lengths) or 1
+    exact = [total * n / size for n in lengths]
+    counts = [int(x) for x in exact]
+    by_remainder = sorted(range(len(chunks)), key=lambda i: exact[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+async def map_chunks(
+    chunks: List[str],
+    fn: Callable[[str, int], Awaitable[T]],
+    max_parallel: int = None
+) -> List[T]:
+    """
+    Run fn(chunk, index) for every chunk with at most max_parallel in flight.
+    Results keep chunk order. A failed chunk is dropped; if every chunk fails the first error is raised.
+    """
+    semaphore = asyncio.Semaphore(max_parallel or settings.TRANSCRIPT_CHUNK_PARALLELISM)
+
+    async def run(chunk: str, index: int):
+        async with semaphore:
+            return await fn(chunk, index)
+
+    results = await asyncio.gather(*(run(c, i) for i, c in enumerate(chunks)), return_exceptions=True)
+
+    ok = [r for r in results if not isinstance(r, BaseException)]
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for index, r in enumerate(results):
+        if isinstance(r, BaseException):
+            print(f"⚠️ Chunk {index + 1}/{len(chunks)} failed: {r}")
+    if errors and not ok:
+        raise errors[0]
+    return ok
+
+
+def dedupe_by(items: Iterable[T], key: Callable[[T], Hashable]) -> List[T]:
+    """Keep the first item for each key, preserving order."""
+    seen = set()
+    unique = []
+    for item in items:
+        k = key(item)
+        if k in seen:
+            continue
+        seen.add(k)
+        unique.append(item)
+    return unique
+
+
+def normalize_text_key(text: Any) -> str:
+    """Case/punctuation-insensitive key for deduping generated questions and cards."""
+    return " ".join(re.sub(r"[^\w\s]", " ", str(text).lower()).split())
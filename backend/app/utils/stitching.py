@@ -0,0 +1,111 @@
+"""
+Join transcripts of consecutive audio chunks.
+Chunks cut mid-speech overlap slightly, so the STT output of the next chunk can
+start by repeating the last few words of the previous one; STT services also
+tend to repeat (or hallucinate) the same sentence over stretches of noise.
+"""
+import re
+from collections import Counter, deque
+from typing import Deque, List, Optional, Set, Tuple
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _norm(word: str) -> str:
+    return "".join(_WORD_RE.findall(word.lower()))
+
+
+def _norm_words(text: str) -> List[str]:
+    return [w for w in (_norm(w) for w in text.split()) if w]
+
+
+def trim_overlap(previous: str, text: str, max_words: int = 12, min_words: int = 2,
+                 max_mismatch_ratio: float = 0.2) -> str:
+    """
+    Drop the longest prefix of `text` that repeats a suffix of `previous`
+    (case/punctuation-insensitive, at least min_words long). Overlaps of five
+    words or more may differ in up to max_mismatch_ratio of their words, since
+    the same audio is rarely transcribed identically twice.
+    """
+    if not previous or not text:
+        return text
+    prev_words: List[str] = [_norm(w) for w in previous.split()[-max_words:]]
+    words = text.split()
+    norm_words = [_norm(w) for w in words[:max_words]]
+
+    for size in range(min(len(prev_words), len(norm_words)), min_words - 1, -1):
+        mismatches = sum(a != b for a, b in zip(prev_words[-size:], norm_words[:size]))
+        allowed = int(size * max_mismatch_ratio) if size >= 5 else 0
+        # The boundary words must agree, or a shifted overlap could be trimmed
+        if mismatches <= allowed and prev_words[-1] == norm_words[size - 1]:
+            return " ".join(words[size:])
+    return text
+
+
+class NearDuplicateFilter:
+    """
+    Bounded rolling-window deduper for transcript segments.
+
+    Each incoming segment first has any prefix that repeats the tail of the
+    transcript trimmed off. It is then compared with the last `window` segments
+    by word-shingle containment (the share of its n-grams already seen). A
+    segment that is mostly contained is dropped as a near-duplicate. Memory
+    is bounded by the window, unlike an ever-growing set of seen strings.
+    """
+
+    def __init__(self, window: int = 50, threshold: float = 0.9, shingle_size: int = 3, tail_words: int = 30):
+        self.window = window
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.tail_words = tail_words
+        self.reset()
+
+    def reset(self):
+        self._segments: Deque[Set[Tuple[str, ...]]] = deque()
+        self._seen: Counter = Counter()
+        self._tail: Deque[str] = deque(maxlen=self.tail_words)
+        self.accepted = 0
+        self.trimmed = 0
+        self.dropped = 0
+
+    def _shingles(self, words: List[str]) -> Set[Tuple[str, ...]]:
+        n = min(self.shingle_size, len(words))
+        return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)} if n else set()
+
+    def _containment(self, shingles: Set[Tuple[str, ...]]) -> float:
+        if not shingles:
+            return 0.0
+        return sum(1 for s in shingles if s in self._seen) / len(shingles)
+
+    def similarity(self, text: str) -> float:
+        """Share of the segment's shingles found in the recent window."""
+        return self._containment(self._shingles(_norm_words(text)))
+
+    def filter(self, text: str) -> Optional[str]:
+        """Return the new part of `text`, or None if it adds nothing."""
+        trimmed = trim_overlap(" ".join(self._tail), text, max_words=self.tail_words).strip()
+        if trimmed != text.strip():
+            self.trimmed += 1
+        words = _norm_words(trimmed)
+        if not words:
+            self.dropped += 1
+            return None
+
+        shingles = self._shingles(words)
+        if self._containment(shingles) >= self.threshold:
+            self.dropped += 1
+            return None
+
+        self._segments.append(shingles)
+        self._seen.update(shingles)
+        if len(self._segments) > self.window:
+            for old in self._segments.popleft():
+                self._seen[old] -= 1
+                if self._seen[old] <= 0:
+                    del self._seen[old]
+        self._tail.extend(trimmed.split())
+        self.accepted += 1
+        return trimmed
+
+    def stats(self) -> dict:
+        return {"accepted": self.accepted, "trimmed": self.trimmed, "dropped": self.dropped}
@@ -0,0 +1,70 @@
+"""WebMDecoder must decode a MediaRecorder stream losslessly however it is sliced."""
+import io
+import random
+
+import numpy as np
+import pytest
+
+av = pytest.importorskip("av")
+
+from app.services.vad import WebMDecoder  # noqa: E402
+
+
+def make_webm(seconds: float, cluster_ms: int, rate: int = 48000) -> bytes:
+    """A WebM/Opus tone, muxed with Clusters of about cluster_ms."""
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="webm", options={"cluster_time_limit": str(cluster_ms)}) as out:
+        stream = out.add_stream("libopus", rate=rate)
+        stream.layout = "mono"
+        t = np.arange(int(seconds * rate)) / rate
+        signal = (0.3 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+        for i in range(0, len(signal), 960):
+            frame = av.AudioFrame.from_ndarray(signal[i:i + 960].reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = rate
+            frame.pts = i
+            for packet in stream.encode(frame):
+                out.mux(packet)
+        for packet in stream.encode(None):
+            out.mux(packet)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("cluster_ms", [1000, 5000, 30000])
+@pytest.mark.parametrize("pieces", [5, 17])
+def test_split_at_arbitrary_offsets_decodes_everything(cluster_ms, pieces):
+    data = make_webm(20.0, cluster_ms)
+    whole = WebMDecoder().decode(data)
+    assert whole is not None and len(whole) / 16000 == pytest.approx(20.0, abs=0.05)
+
+    rng = random.Random(cluster_ms * pieces)
+    bounds = [0, *sorted(rng.sample(range(1, len(data)), pieces - 1)), len(data)]
+    decoder = WebMDecoder()
+    decoded = 0
+    for start, end in zip(bounds, bounds[1:]):
+        pcm = decoder.decode(data[start:end])
+        assert pcm is not None
+        decoded += len(pcm)
+    assert decoded == len(whole)
+
+
+def test_new_recording_restarts_the_stream():
+    data = make_webm(4.0, 1000)
+    decoder = WebMDecoder()
+    first = decoder.decode(data)
+    second = decoder.decode(data)  # MediaRecorder restarted: a new header and timeline
+    assert len(first) == len(second) > 0
+
+
+def test_stream_joined_mid_way_cannot_be_decoded():
+    data = make_webm(4.0, 1000)
+    assert WebMDecoder().decode(data[len(data) // 2:]) is None
+
+
+def test_skipped_audio_is_reported_as_a_gap():
+    data = make_webm(8.0, 1000)
+    decoder = WebMDecoder()
+    decoder.decode(data[:len(data) // 4])
+    assert decoder.last_gap == 0.0
+    # Lose a stretch of the stream: the decoder resumes at the next Cluster and says how much it skipped
+    decoder.decode(data[len(data) // 2:])
+    assert decoder.last_gap > 1.0
@@ -3,7 +3,7 @@ import { useNavigate } from 'react-router-dom'
 import { motion, AnimatePresence } from 'framer-motion'
 import { ArrowLeft, FileText, Calendar, MessageSquare, Trash2, Search } from 'lucide-react'
 import { api } from '@/services/api'
-import { useStore } from '@/store/useStore'
+import { useStore, SessionListItem } from '@/store/useStore'
 import { format } from 'date-fns'
 
 export default function History() {
@@ -13,15 +13,49 @@ export default function History() {
   const [deleteModal, setDeleteModal] = useState<{ id: string; name: string } | null>(null)
   const [deleting, setDeleting] = useState(false)
   const [searchTerm, setSearchTerm] = useState('')
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // Full-text matches from /api/search: session id -> best snippet, in rank order (null when not searching)
+  const [searchHits, setSearchHits] = useState<Map<string, { title: string; snippet: string }> | null>(null)
 
   useEffect(() => {
     loadSessions()
   }, [])
 
+  useEffect(() => {
+    const query = searchTerm.trim()
+    if (!query) {
+      setSearchHits(null)
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        const data = await api.search(query, 50)
+        const hits = new Map<string, { title: string; snippet: string }>()
+        for (const result of data.results) {
+          if (!hits.has(result.session_id)) {
+            hits.set(result.session_id, { title: result.title, snippet: result.snippet })
+          }
+        }
+        if (!cancelled) setSearchHits(hits)
+      } catch (error) {
+        // Search unavailable: fall back to filtering the loaded cards by name/preview
+        console.error('Search failed:', error)
+        if (!cancelled) setSearchHits(null)
+      }
+    }, 300)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [searchTerm])
+
   const loadSessions = async () => {
     try {
       const data = await api.getSessions()
       setSessions(data.sessions)
+      setNextCursor(data.next_cursor)
     } catch (error) {
       console.error('Failed to load sessions:', error)
     } finally {
@@ -29,6 +63,20 @@ export default function History() {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const data = await api.getSessions(nextCursor)
+      setSessions([...sessions, ...data.sessions])
+      setNextCursor(data.next_cursor)
+    } catch (error) {
+      console.error('Failed to load more sessions:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDeleteClick = (sessionId: string, sessionName: string, e: React.MouseEvent) => {
     e.stopPropagation()
     setDeleteModal({ id: sessionId, name: sessionName })
@@ -50,11 +98,25 @@ export default function History() {
     }
   }
 
-  const filteredSessions = sessions.filter(session =>
+  const localMatches = sessions.filter(session =>
     (session.name || 'Untitled').toLowerCase().includes(searchTerm.toLowerCase()) ||
-    (session.transcript || '').toLowerCase().includes(searchTerm.toLowerCase())
+    (session.preview || '').toLowerCase().includes(searchTerm.toLowerCase())
   )
 
+  // Transcript matches first (including sessions on pages not loaded yet), then name/preview matches
+  const filteredSessions: SessionListItem[] = searchHits
+    ? [
+        ...Array.from(searchHits, ([id, hit]) => ({
+          ...(sessions.find(session => session.id === id) || {
+            id, name: hit.title, timestamp: '', transcript_chars: 0, chat_count: 0,
+            has_summary: false, has_terminologies: false, has_qa: false
+          }),
+          preview: hit.snippet
+        })),
+        ...localMatches.filter(session => !searchHits.has(session.id))
+      ]
+    : localMatches
+
   return (
     <div className="min-h-screen bg-true-black relative overflow-hidden font-sans selection:bg-royal-purple selection:text-white">
       {/* Background Features */}
@@ -154,7 +216,7 @@ export default function History() {
                       </div>
 
                       <div className="flex items-center gap-2">
-                        {session.summary && (
+                        {session.has_summary && (
                           <span className="px-2 py-1 text-[10px] font-bold uppercase tracking-wider text-emerald-400 bg-emerald-400/10 rounded-lg border border-emerald-400/20">
                             Analyzed
                           </span>
@@ -173,19 +235,21 @@ export default function History() {
                     </h3>
 
                     <div className="flex items-center gap-4 text-sm text-secondary-gray mb-6">
-                      <div className="flex items-center gap-1.5">
-                        <Calendar className="w-3.5 h-3.5" />
-                        <span>{format(new Date(session.timestamp), 'MMM dd')}</span>
-                      </div>
+                      {session.timestamp && (
+                        <div className="flex items-center gap-1.5">
+                          <Calendar className="w-3.5 h-3.5" />
+                          <span>{format(new Date(session.timestamp), 'MMM dd')}</span>
+                        </div>
+                      )}
                       <div className="flex items-center gap-1.5">
                         <MessageSquare className="w-3.5 h-3.5" />
-                        <span>{(session.chat?.length || (session as any).chat_messages?.length || 0)} chats</span>
+                        <span>{session.chat_count || 0} chats</span>
                       </div>
                     </div>
 
                     <div className="relative">
                       <p className="text-sm text-gray-500 line-clamp-3 leading-relaxed">
-                        {session.transcript}
+                        {session.preview}
                       </p>
                       <div className="absolute bottom-0 left-0 w-full h-8 bg-gradient-to-t from-[#0D0D12] to-transparent" />
                     </div>
@@ -201,6 +265,18 @@ export default function History() {
           </div>
         )}
 
+        {!loading && nextCursor && (
+          <div className="flex justify-center mt-10">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-8 py-3 bg-white/5 border border-white/10 rounded-xl font-medium text-light-gray hover:bg-white/10 hover:border-royal-purple/50 transition-all duration-300 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
+
         {/* Delete Modal */}
         <AnimatePresence>
           {deleteModal && (
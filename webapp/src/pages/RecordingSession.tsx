@@ -33,6 +33,8 @@ export default function RecordingSession() {
 
   // Track received texts outside useEffect to persist across renders
   const receivedTextsRef = useRef(new Set<string>())
+  // Live session the current recording went to (from /session/start)
+  const liveSessionIdRef = useRef<string | null>(null)
 
   useEffect(() => {
     socketService.connect()
@@ -52,8 +54,19 @@ export default function RecordingSession() {
       setStatus(data.status as any)
     })
 
+    // Server transcription queue is backing up: hold audio locally until it says resume
+    socketService.on('backpressure', (data: any) => {
+      if (data.action === 'slow_down') {
+        slowDownRef.current = true
+      } else if (data.action === 'resume') {
+        slowDownRef.current = false
+        flushHeldAudio()
+      }
+    })
+
+    // Transcripts are pushed over the socket; only poll as a fallback while it is down
     const pollInterval = setInterval(async () => {
-      if (isRecording) {
+      if (isRecording && !socketService.isConnected()) {
         try {
           const response = await api.pollTranscription().catch(err => {
             console.warn('Poll failed (ignoring):', err.message);
@@ -99,25 +112,43 @@ export default function RecordingSession() {
   }, [isRecording])
 
   const mediaRecorderRef = useRef<MediaRecorder | null>(null)
+  const slowDownRef = useRef(false)
+  const heldAudioRef = useRef<Blob[]>([])
+
+  // Raw bytes in a binary frame: no base64 inflation or JSON parsing on the server
+  const sendAudio = (blob: Blob) => {
+    blob.arrayBuffer().then(buffer => socketService.sendAudio(buffer))
+  }
+
+  // Consecutive MediaRecorder chunks concatenate into one valid continuation
+  const flushHeldAudio = () => {
+    if (heldAudioRef.current.length > 0) {
+      sendAudio(new Blob(heldAudioRef.current, { type: 'audio/webm' }))
+      heldAudioRef.current = []
+    }
+  }
 
   const handleStart = async () => {
     try {
       receivedTextsRef.current.clear()
-      await api.startSession()
+      const started = await api.startSession()
+      if (started.sessionId) liveSessionIdRef.current = started.sessionId
 
       // Request microphone access
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true })
       const mediaRecorder = new MediaRecorder(stream, { mimeType: 'audio/webm' })
       mediaRecorderRef.current = mediaRecorder
 
+      slowDownRef.current = false
+      heldAudioRef.current = []
+
       mediaRecorder.ondataavailable = async (event) => {
         if (event.data.size > 0) {
-          const reader = new FileReader()
-          reader.onloadend = () => {
-            const base64Audio = (reader.result as string).split(',')[1]
-            socketService.send({ type: 'audio', data: base64Audio })
+          if (slowDownRef.current) {
+            heldAudioRef.current.push(event.data)
+          } else {
+            sendAudio(event.data)
           }
-          reader.readAsDataURL(event.data)
         }
       }
 
@@ -137,6 +168,8 @@ export default function RecordingSession() {
         mediaRecorderRef.current.stop()
         mediaRecorderRef.current.stream.getTracks().forEach(track => track.stop())
       }
+      slowDownRef.current = false
+      flushHeldAudio()
 
       await api.stopSession()
       setRecording(false)
@@ -163,7 +196,8 @@ export default function RecordingSession() {
       setProcessing(true)
 
       console.log('Saving session with name:', sessionName.trim())
-      await api.saveSession(transcript, messages, sessionName.trim())
+      await api.saveSession(transcript, messages, sessionName.trim(), liveSessionIdRef.current)
+      liveSessionIdRef.current = null
 
       clearSession()
       receivedTextsRef.current.clear()
@@ -30,14 +30,18 @@ export const api = {
     return response.data
   },
 
-  saveSession: async (transcript: string, chat: any[], name?: string) => {
-    const response = await axios.post(`${API_BASE}/session/save`, { transcript, chat, name })
+  // liveSessionId: the live session the transcript was recorded in (its rolling summary is saved with it)
+  saveSession: async (transcript: string, chat: any[], name?: string, liveSessionId?: string | null) => {
+    const response = await axios.post(`${API_BASE}/session/save`, {
+      transcript, chat, name, liveSessionId: liveSessionId || undefined
+    })
     return response.data
   },
 
   // History
-  getSessions: async () => {
-    const response = await axios.get(`${API_BASE}/sessions`)
+  // One page of list cards; pass next_cursor from the previous page to continue
+  getSessions: async (cursor?: string | null, limit: number = 20) => {
+    const response = await axios.get(`${API_BASE}/sessions`, { params: { cursor: cursor || undefined, limit } })
     return response.data
   },
 
@@ -51,6 +55,12 @@ export const api = {
     return response.data
   },
 
+  // Ranked full-text search over saved transcripts and generated material
+  search: async (q: string, limit: number = 10, kind?: string) => {
+    const response = await axios.get(`${API_BASE}/search`, { params: { q, limit, kind } })
+    return response.data
+  },
+
   // Q&A
   askQuestion: async (question: string, thinkMode: boolean = false) => {
     const response = await axios.post(`${API_BASE}/qa/ask`, { question, think_mode: thinkMode })
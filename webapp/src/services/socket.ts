@@ -1,4 +1,8 @@
+const AUDIO_FRAME_VERSION = 1
+const AUDIO_CODEC_WEBM = 1
+
 class WebSocketService {
+  private audioSeq = 0
   private ws: WebSocket | null = null
   private listeners: Map<string, Set<Function>> = new Map()
   private reconnectAttempts = 0
@@ -114,11 +118,32 @@ class WebSocketService {
     }
   }
 
+  isConnected() {
+    return this.ws !== null && this.ws.readyState === WebSocket.OPEN
+  }
+
   send(data: any) {
     if (this.ws && this.ws.readyState === WebSocket.OPEN) {
       this.ws.send(JSON.stringify(data))
     }
   }
+
+  // Binary audio frame (see backend app/services/audio_frames.py):
+  // "AU" | version | codec | seq (u32 BE) | session id length | session id | audio
+  sendAudio(audio: ArrayBuffer, sessionId: string = '') {
+    if (!this.ws || this.ws.readyState !== WebSocket.OPEN) {
+      return
+    }
+    const sid = new TextEncoder().encode(sessionId)
+    const frame = new Uint8Array(9 + sid.length + audio.byteLength)
+    const view = new DataView(frame.buffer)
+    frame.set([0x41, 0x55, AUDIO_FRAME_VERSION, AUDIO_CODEC_WEBM])
+    view.setUint32(4, this.audioSeq++ >>> 0)
+    frame[8] = sid.length
+    frame.set(sid, 9)
+    frame.set(new Uint8Array(audio), 9 + sid.length)
+    this.ws.send(frame)
+  }
 }
 
 export const socketService = new WebSocketService()
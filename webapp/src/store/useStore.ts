@@ -80,11 +80,24 @@ export interface Session {
   translations?: TranslationLog[]
 }
 
+// History list card from /api/sessions (full documents come from /api/sessions/:id)
+export interface SessionListItem {
+  id: string
+  name: string
+  timestamp: string
+  preview: string
+  transcript_chars: number
+  chat_count: number
+  has_summary: boolean
+  has_terminologies: boolean
+  has_qa: boolean
+}
+
 interface AppState {
   isRecording: boolean
   transcript: string
   messages: Message[]
-  sessions: Session[]
+  sessions: SessionListItem[]
   currentSession: Session | null
   isProcessing: boolean
 
@@ -92,7 +105,7 @@ interface AppState {
   appendTranscript: (text: string) => void
   addMessage: (message: Message) => void
   clearSession: () => void
-  setSessions: (sessions: Session[]) => void
+  setSessions: (sessions: SessionListItem[]) => void
   setCurrentSession: (session: Session | null) => void
   setProcessing: (processing: boolean) => void
 }